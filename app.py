@@ -3,191 +3,638 @@ Household Spending Estimates - Flask Application
 Australian household grocery spending estimates from ABS MHSI data
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, abort, make_response, render_template, jsonify, request
+from markupsafe import Markup
+import io
+import os
+import threading
 from datetime import datetime
 import pandas as pd
-from data_fetcher import get_spending_data, get_summary_stats, get_chart_data
+from data_fetcher import build_spending_data, get_spending_data, get_summary_stats, load_history
+from assets import init_assets
+from data_store import (
+    LAST_FETCH_PATH,
+    dataframe_version,
+    load_snapshot,
+    refresh_lock,
+    save_snapshot,
+    snapshot_age,
+    touch
+)
+from http_cache import cached_api, cached_page, init_compression
+from metrics import init_request_metrics, record_cache, registry, render as render_metrics
+from refresher import DataRefresher, MIN_REFRESH_INTERVAL, REFRESH_INTERVAL
+from series_store import get_series_store
+from forecast import DEFAULT_SERIES, MAX_HORIZON, cube_forecasts, mhsi_forecasts
+from uncertainty import cached_distribution_bands, distribution_bands, series_bands
+from vintage_store import FOOD_SERIES, get_vintage_store, parse_release_date
+from ingest import apply_cached_reference_data, refresh_sources
+from payloads import dumps, loads, get_hes_payloads, get_mhsi_payloads
+from data_export import (
+    DEFAULT_PAGE_SIZE,
+    decode_cursor,
+    get_table_page,
+    iter_export,
+    parse_columns,
+    parse_sort
+)
 from hes_data import (
-    get_income_quintile_data, 
-    get_household_type_data, 
-    get_ndis_segment_data,
-    get_distribution_summary,
-    get_chart_data_quintiles,
-    get_chart_data_household,
-    get_chart_data_ndis,
-    get_per_person_summary,
-    get_per_person_chart_data,
-    get_cross_tabulation_matrix,
-    # New Table 9.1 functions
-    get_lone_person_spending_table_9_1,
-    get_lone_person_summary,
-    get_methodology_comparison
+    get_hes_snapshot,
+    get_hes_parameters_version,
+    get_cross_tab,
+    estimate_households,
+    ESTIMATE_INPUT_COLUMNS,
+    ESTIMATE_OUTPUT_COLUMNS
 )
 
 app = Flask(__name__)
-
-# Cache for data (refresh on app restart)
-_data_cache = None
-_cache_time = None
+init_request_metrics(app)
+init_compression(app)
+init_assets(app)
+
+# Embed the distribution chart data in the page instead of a follow-up request
+INLINE_DISTRIBUTION_DATA = os.environ.get('INLINE_DISTRIBUTION_DATA', '1').lower() not in ('0', 'false', 'no')
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def with_version(df):
+    """Tag a DataFrame with its content version (used for HTTP ETags)."""
+    df.attrs['version'] = dataframe_version(df)
+    return df
+
+
+def prepared(df, bands=True):
+    """
+    Serialize the API payloads for newly loaded data before it is served.
+    The Monte Carlo bands of the chart data and of the current HES snapshot
+    (whose version changes when ingested CPI data is applied) are computed
+    too; bands=False skips them, for loads that may run on a request
+    thread. The refresher computes them for the same data.
+    """
+    if df is not None:
+        if bands:
+            series_bands(df)
+            distribution_bands(get_hes_snapshot())
+        get_mhsi_payloads(df)
+        mhsi_forecasts(df)
+    return df
+
+
+def load_data(force=False):
+    """
+    Load spending data for the refresher.
+    A recent on-disk snapshot (possibly written by another worker) is used
+    without a network call; otherwise fetch from the API and save a new one.
+    A forced load still reuses a snapshot younger than MIN_REFRESH_INTERVAL.
+    The CPI and household sources cached with it are applied first.
+    """
+    apply_cached_reference_data()
+    max_age = MIN_REFRESH_INTERVAL if force else REFRESH_INTERVAL
+    df = load_snapshot(max_age=max_age)
+    record_cache('dataset_snapshot', df is not None)
+    if df is not None:
+        return prepared(df)
+
+    # One worker fetches at a time; the others then pick up its snapshot
+    with refresh_lock():
+        df = load_snapshot(max_age=max_age)
+        if df is not None:
+            return prepared(df)
+        # A fetch that just failed in another worker isn't repeated: use the history it kept
+        last_fetch = snapshot_age(LAST_FETCH_PATH)
+        if last_fetch is not None and last_fetch < MIN_REFRESH_INTERVAL:
+            return build_data(load_history(), 'error')
+        try:
+            return fetch_data()
+        finally:
+            touch(LAST_FETCH_PATH)
+
+
+def fetch_data():
+    """Fetch every source and build the dataset (callers hold refresh_lock)."""
+    # MHSI, cube, CPI and household sources are fetched concurrently
+    sources = refresh_sources()
+    history, status = sources['mhsi'] or (None, 'error')
+    return build_data(history, status)
+
+
+def build_data(history, status):
+    """Dataset for fetch_incremental's (history, status), saving a snapshot when fresh."""
+    # Months unchanged since the data being served are not reprocessed
+    df = with_version(build_spending_data(history, previous=_refresher.current_data, status=status))
+    if df['data_source'].iloc[-1] == 'api':
+        save_snapshot(df, extra_meta={'households_key': df.attrs.get('households_key'),
+                                      'fetched_at': df.attrs.get('fetched_at')})
+        return prepared(df)
+    if df['data_source'].iloc[-1] == 'api_stale':
+        # ABS unreachable: serve the last successfully fetched history, tagged with its age
+        return prepared(df)
+
+    # API unavailable: an older snapshot still beats the manual data
+    snapshot = load_snapshot()
+    return prepared(snapshot if snapshot is not None else df)
+
+
+def load_local_data():
+    """Fast start-up data: last snapshot if any, else the manual dataset."""
+    apply_cached_reference_data()
+    df = load_snapshot()
+    return prepared(df if df is not None else with_version(get_spending_data(use_api=False)), bands=False)
+
+
+# Data cache, reloaded in the background (never on a request thread)
+_refresher = DataRefresher(loader=load_data, fallback_loader=load_local_data)
 
 
 def get_data(force_refresh=False):
-    """Get spending data with simple caching."""
-    global _data_cache, _cache_time
-    
-    if _data_cache is None or force_refresh:
-        _data_cache = get_spending_data(use_api=True)
-        _cache_time = datetime.now()
-    
-    return _data_cache
+    """Get the last good spending data; force_refresh schedules a background reload."""
+    if force_refresh:
+        _refresher.trigger()
+    df, _ = _refresher.get()
+    return df
+
+
+def get_cache_time():
+    """Time the currently served data was loaded."""
+    _, loaded_at = _refresher.get()
+    return loaded_at
+
+
+def json_response(body):
+    """Response for pre-serialized JSON bytes."""
+    return Response(body, mimetype='application/json')
+
+
+# Set once this worker has data and serialized payloads to serve
+_ready = threading.Event()
+_warm_up_pid = None
+_warm_up_lock = threading.Lock()
+
+
+def warm_up():
+    """Load the dataset and precompute payloads, then mark the worker ready."""
+    try:
+        df = get_data()  # local snapshot or manual data; starts the background refresher
+        series_bands(df)
+        get_mhsi_payloads(df)
+        get_hes_payloads(get_hes_snapshot())
+        distribution_bands(get_hes_snapshot())
+        _ready.set()
+    except Exception as e:
+        print(f"Error warming up: {e}")
+
+
+def start_warm_up():
+    """Run warm_up in a background thread, once per worker process."""
+    global _warm_up_pid
+    if _warm_up_pid == os.getpid():
+        return
+    with _warm_up_lock:
+        if _warm_up_pid == os.getpid():
+            return
+        _warm_up_pid = os.getpid()
+        _ready.clear()
+        threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+def get_data_version():
+    """Version of the MHSI data currently served."""
+    return get_data().attrs.get('version', '')
+
+
+def get_chart_version():
+    """Chart data version: the data version, changing again once its percentile bands are added."""
+    df = get_data()
+    bands = 'bands' if get_mhsi_payloads(df).has_bands else 'no-bands'
+    return f"{df.attrs.get('version', '')}-{bands}"
+
+
+def request_hes_snapshot():
+    """HES snapshot for the request's ?as_of=YYYY-MM (400 if the month is unavailable)."""
+    try:
+        return get_hes_snapshot(request.args.get('as_of'))
+    except ValueError as e:
+        abort(make_response(jsonify({'error': str(e)}), 400))
+
+
+def get_dashboard_version():
+    """Dashboard page version: the data version plus its load time (shown as 'last updated')."""
+    df, loaded_at = _refresher.get()
+    return f"{df.attrs.get('version', '')}|{loaded_at.isoformat()}"
+
+
+def get_series_version():
+    """Version of the loaded MHSI series cube."""
+    store = get_series_store()
+    return store.version if store is not None else ''
+
+
+def get_forecast_version():
+    """Versions of the dataset and series cube the forecasts are fitted to."""
+    return f"{get_data_version()}-{get_series_version()}"
+
+
+def get_vintage_version():
+    """Version of the MHSI vintage store (changes when a release is recorded)."""
+    return get_vintage_store().version()
+
+
+def records(df):
+    """DataFrame rows as JSON-ready dicts (NaN as null)."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is serving requests (no I/O, no data access)."""
+    response = Response('ok', mimetype='text/plain')
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once this worker has warmed up, 503 until then."""
+    start_warm_up()
+    if _ready.is_set():
+        df, loaded_at = _refresher.get()
+        response = jsonify({
+            'status': 'ready',
+            'data_version': df.attrs.get('version', ''),
+            'data_source': df['data_source'].iloc[-1] if len(df) else None,
+            'loaded_at': loaded_at.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    else:
+        response = jsonify({'status': 'warming_up'})
+        response.status_code = 503
+    response.cache_control.no_store = True
+    return response
 
 
 @app.route('/')
+@cached_page(get_dashboard_version)
 def index():
     """Dashboard homepage."""
     df = get_data()
     stats = get_summary_stats(df)
+    cache_time = get_cache_time()
     
     return render_template('index.html', 
                          stats=stats,
-                         last_updated=_cache_time.strftime('%Y-%m-%d %H:%M:%S') if _cache_time else 'Unknown')
+                         last_updated=cache_time.strftime('%Y-%m-%d %H:%M:%S') if cache_time else 'Unknown')
 
 
 @app.route('/methodology')
+@cached_page(get_hes_parameters_version)
 def methodology():
     """Methodology explanation page."""
     # Get methodology comparison for display
-    comparison = get_methodology_comparison()
+    comparison = get_hes_snapshot().methodology_comparison
     
     return render_template('methodology.html', 
                          methodology_comparison=comparison)
 
 
 @app.route('/data')
+@cached_page(get_data_version)
 def data_table():
-    """Full data table page."""
+    """Full data table page (rows are loaded page by page from /api/data)."""
     df = get_data()
     
-    # Prepare table data
-    table_data = df[[
-        'month', 
-        'food_aud_m_sa', 
-        'households', 
-        'food_per_household_month',
-        'food_per_hh_12m_avg'
-    ]].to_dict('records')
-    
     return render_template('data.html', 
-                         table_data=table_data,
-                         total_rows=len(table_data))
+                         total_rows=len(df),
+                         first_month=df['month'].iloc[0] if len(df) else None,
+                         last_month=df['month'].iloc[-1] if len(df) else None)
 
 
 @app.route('/distribution')
+@cached_page(get_hes_parameters_version, params=('as_of',))
 def distribution():
     """Distribution analysis page - spending by income and household type."""
-    summary = get_distribution_summary()
-    quintile_data = get_income_quintile_data().to_dict('records')
-    household_data = get_household_type_data().to_dict('records')
-    ndis_data = get_ndis_segment_data().to_dict('records')
-    per_person_summary = get_per_person_summary()
-    cross_tab_matrix = get_cross_tabulation_matrix().to_dict('records')
-    
-    # New: Add lone person analysis
-    lone_person_data = get_lone_person_spending_table_9_1().to_dict('records')
-    lone_person_summary = get_lone_person_summary()
-    methodology_comparison = get_methodology_comparison()
+    hes = request_hes_snapshot()
+    bundle = Markup(get_hes_payloads(hes).inline_bundle) if INLINE_DISTRIBUTION_DATA else None
     
     return render_template('distribution.html',
-                         summary=summary,
-                         quintile_data=quintile_data,
-                         household_data=household_data,
-                         ndis_data=ndis_data,
-                         per_person_summary=per_person_summary,
-                         cross_tab_matrix=cross_tab_matrix,
+                         summary=hes.distribution_summary,
+                         quintile_data=hes.records['quintile_data'],
+                         household_data=hes.records['household_data'],
+                         ndis_data=hes.records['ndis_data'],
+                         per_person_summary=hes.per_person_summary,
+                         cross_tab_matrix=hes.records['cross_tab_matrix'],
                          # New data
-                         lone_person_data=lone_person_data,
-                         lone_person_summary=lone_person_summary,
-                         methodology_comparison=methodology_comparison)
+                         lone_person_data=hes.records['lone_person_data'],
+                         lone_person_summary=hes.lone_person_summary,
+                         methodology_comparison=hes.methodology_comparison,
+                         price_period=hes.price_period,
+                         distribution_bundle=bundle)
 
 
 @app.route('/api/chart-data')
+@cached_api(get_chart_version)
 def api_chart_data():
     """API endpoint for chart data."""
+    try:
+        months = int(request.args.get('months', 24))
+    except ValueError:
+        months = -1
+    if months < 0:
+        return jsonify({'error': 'months must be a non-negative integer'}), 400
     df = get_data()
-    months = int(request.args.get('months', 24))
-    chart_data = get_chart_data(df, months)
-    return jsonify(chart_data)
+    return json_response(get_mhsi_payloads(df).chart_data(months))
 
 
 @app.route('/api/summary')
+@cached_api(get_data_version)
 def api_summary():
     """API endpoint for summary statistics."""
+    return json_response(get_mhsi_payloads(get_data()).summary)
+
+
+@app.route('/api/data')
+@cached_api(get_data_version)
+def api_data():
+    """API endpoint for one page of the data table."""
     df = get_data()
-    stats = get_summary_stats(df)
-    return jsonify(stats)
+    try:
+        columns = parse_columns(df, request.args.get('columns'))
+        sort, descending = parse_sort(df, request.args.get('sort'))
+        cursor = request.args.get('cursor')
+        offset = decode_cursor(cursor) if cursor else int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    page = get_table_page(df, offset, limit, columns, sort, descending)
+    return json_response(dumps(page))
+
+
+@app.route('/api/data/export')
+def api_data_export():
+    """Stream the data table as CSV or NDJSON."""
+    df = get_data()
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+    try:
+        columns = parse_columns(df, request.args.get('columns'))
+        sort, descending = parse_sort(df, request.args.get('sort'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = f"household_spending_data_{datetime.now():%Y-%m-%d}.{fmt}"
+    return Response(iter_export(df, fmt, columns, sort, descending),
+                    mimetype=EXPORT_MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 
 @app.route('/api/refresh')
 def api_refresh():
-    """API endpoint to force data refresh."""
-    df = get_data(force_refresh=True)
+    """
+    API endpoint to schedule a data refresh; returns the data currently served.
+    status is 'scheduled', 'pending' (joins a queued or running refresh) or
+    'recent' (data loaded within DATA_MIN_REFRESH_INTERVAL; nothing queued).
+    """
+    status = _refresher.trigger()
+    df = get_data()
     stats = get_summary_stats(df)
-    return jsonify({
+    response = jsonify({
         'success': True,
-        'refreshed_at': _cache_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'status': status,
+        'refreshed_at': get_cache_time().strftime('%Y-%m-%d %H:%M:%S'),
         'total_months': len(df),
         'latest_month': stats['latest_month']
     })
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/api/series')
+@cached_api(get_series_version)
+def api_series():
+    """API endpoint for one MHSI series slice by region and category."""
+    store = get_series_store()
+    if store is None:
+        return jsonify({'error': 'Series data not loaded yet'}), 503
+    
+    region = request.args.get('region')
+    category = request.args.get('category')
+    if not region or not category:
+        return jsonify(store.index())
+    
+    series = store.query(region, category,
+                         start=request.args.get('from'),
+                         end=request.args.get('to'))
+    if series is None:
+        return jsonify({'error': f'Unknown region/category: {region}/{category}'}), 404
+    return jsonify(series)
+
+
+@app.route('/api/forecast')
+@cached_api(get_forecast_version)
+def api_forecast():
+    """
+    API endpoint for a series forecast with 80% and 95% prediction intervals.
+    series is a data column (default food_per_household_month) or an MHSI
+    cube series as REGION.CATEGORY; horizon is 1-12 months (default 12).
+    """
+    series = request.args.get('series') or DEFAULT_SERIES
+    try:
+        horizon = int(request.args.get('horizon', MAX_HORIZON))
+    except ValueError:
+        horizon = 0
+    if not 1 <= horizon <= MAX_HORIZON:
+        return jsonify({'error': f'horizon must be between 1 and {MAX_HORIZON}'}), 400
+    
+    if '.' in series:
+        store = get_series_store()
+        if store is None:
+            return jsonify({'error': 'Series data not loaded yet'}), 503
+        result = cube_forecasts(store).series(series, horizon)
+    else:
+        result = mhsi_forecasts(get_data()).series(series, horizon)
+    if result is None:
+        return jsonify({'error': f'Unknown series: {series}'}), 404
+    return json_response(dumps(result))
+
+
+@app.route('/api/vintages')
+@cached_api(get_vintage_version)
+def api_vintages():
+    """
+    API endpoint for recorded MHSI releases. Without parameters lists the
+    releases and series. With series (default the national food series):
+    month=YYYY-MM gives every published value of that month, from=DATE
+    (and optional to=DATE) the revisions between two releases, and
+    as_of=DATE the series as published in that release (default latest).
+    """
+    store = get_vintage_store()
+    if not request.args:
+        return jsonify({'releases': store.releases(), 'series': store.series()})
+    
+    series = request.args.get('series', FOOD_SERIES)
+    if series not in store.series():
+        return jsonify({'error': f'Unknown series: {series}'}), 404
+    try:
+        dates = {key: parse_release_date(request.args[key])
+                 for key in ('as_of', 'from', 'to') if key in request.args}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if 'month' in request.args:
+        month = request.args['month']
+        return jsonify({'series': series, 'month': month,
+                        'vintages': records(store.month_vintages(series, month))})
+    if 'from' in dates:
+        return jsonify({'series': series, 'from': dates['from'], 'to': dates.get('to'),
+                        'revisions': records(store.revisions(series, dates['from'], dates.get('to')))})
+    return jsonify({'series': series, 'as_of': dates.get('as_of'),
+                    'data': records(store.as_of(series, dates.get('as_of')))})
+
+
+@app.route('/api/distribution/bundle')
+@cached_api(get_hes_parameters_version, max_age=3600)
+def api_distribution_bundle():
+    """API endpoint for every distribution chart dataset in one payload."""
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['bundle'])
+
+
+@app.route('/api/distribution/bands')
+@cached_api(get_hes_parameters_version, max_age=3600)
+def api_distribution_bands():
+    """
+    API endpoint for Monte Carlo percentile bands of the quintile and household type tables.
+    The bands are computed in the background; 503 until they are ready.
+    """
+    bands = cached_distribution_bands(request_hes_snapshot())
+    if bands is None:
+        response = jsonify({'error': 'Uncertainty bands are still being computed'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '10'
+        return response
+    return json_response(dumps(bands))
 
 
 @app.route('/api/distribution/quintiles')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_distribution_quintiles():
     """API endpoint for income quintile chart data."""
-    return jsonify(get_chart_data_quintiles())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['quintiles'])
 
 
 @app.route('/api/distribution/household')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_distribution_household():
     """API endpoint for household type chart data."""
-    return jsonify(get_chart_data_household())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['household'])
 
 
 @app.route('/api/distribution/ndis')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_distribution_ndis():
     """API endpoint for NDIS segment chart data."""
-    return jsonify(get_chart_data_ndis())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['ndis'])
 
 
 @app.route('/api/distribution/per-person')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_distribution_per_person():
     """API endpoint for per-person comparison chart data."""
-    return jsonify(get_per_person_chart_data())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['per_person'])
 
 
 @app.route('/api/distribution/per-person-summary')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_per_person_summary():
     """API endpoint for per-person summary statistics."""
-    return jsonify(get_per_person_summary())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['per_person_summary'])
+
+
+@app.route('/api/distribution/cross-tab')
+@cached_api(get_hes_parameters_version, max_age=3600)
+def api_distribution_cross_tab():
+    """API endpoint for the per-person cross-tabulation over selected dimensions."""
+    dims = request.args.get('dims')
+    if not dims:
+        return json_response(get_hes_payloads(request_hes_snapshot()).bodies['cross_tab'])
+    dimensions = dims.split(',')
+    try:
+        return jsonify(get_cross_tab(dimensions, as_of=request.args.get('as_of')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/estimate/batch', methods=['POST'])
+def api_estimate_batch():
+    """
+    Estimate spending for a batch of household profiles.
+    Accepts a JSON array (or {"profiles": [...]}) or a CSV body; streams
+    NDJSON back, or CSV with ?format=csv.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+    
+    try:
+        if request.mimetype == 'text/csv':
+            profiles = pd.read_csv(io.BytesIO(request.get_data()), dtype={'income_quintile': str})
+        else:
+            body = loads(request.get_data())
+            if isinstance(body, dict):
+                body = body.get('profiles', [])
+            if not isinstance(body, list):
+                raise ValueError('Expected a list of profiles')
+            profiles = pd.DataFrame.from_records(body)
+    except Exception as e:
+        return jsonify({'error': f'Could not read profiles: {e}'}), 400
+    
+    try:
+        result = estimate_households(profiles, as_of=request.args.get('as_of'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    passthrough = [c for c in result.columns if c not in ESTIMATE_INPUT_COLUMNS + ESTIMATE_OUTPUT_COLUMNS]
+    columns = passthrough + [c for c in ESTIMATE_INPUT_COLUMNS if c in result.columns] + list(ESTIMATE_OUTPUT_COLUMNS)
+    return Response(iter_export(result, fmt, columns, sort=None), mimetype=EXPORT_MIMETYPES[fmt])
 
 
 # NEW ENDPOINTS FOR TABLE 9.1 LONE PERSON ANALYSIS
 @app.route('/api/distribution/lone-person')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_lone_person():
     """API endpoint for lone person spending (Table 9.1)."""
-    df = get_lone_person_spending_table_9_1()
-    return jsonify(df.to_dict('records'))
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['lone_person'])
 
 
 @app.route('/api/distribution/lone-person-summary')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_lone_person_summary():
     """API endpoint for lone person summary."""
-    return jsonify(get_lone_person_summary())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['lone_person_summary'])
 
 
 @app.route('/api/distribution/methodology-comparison')
+@cached_api(get_hes_parameters_version, max_age=3600)
 def api_methodology_comparison():
     """API endpoint for Table 3.4 vs Table 9.1 comparison."""
-    return jsonify(get_methodology_comparison())
+    return json_response(get_hes_payloads(request_hes_snapshot()).bodies['methodology_comparison'])
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics, aggregated over every worker."""
+    counters, histograms = registry.collect()
+    gauges = {}
+    loaded_at = get_cache_time()
+    if loaded_at is not None:
+        gauges['data_age_seconds'] = (datetime.now() - loaded_at).total_seconds()
+    age = snapshot_age()
+    if age is not None:
+        gauges['data_snapshot_age_seconds'] = age
+    return Response(render_metrics(counters, histograms, gauges),
+                    mimetype='text/plain; version=0.0.4')
 
 
 @app.template_filter('format_currency')
@@ -198,6 +645,14 @@ def format_currency(value):
     return f"${value:,.2f}"
 
 
+@app.template_filter('format_dollars')
+def format_dollars(value):
+    """Format value as whole dollars."""
+    if value is None:
+        return 'N/A'
+    return f"${int(value)}"
+
+
 @app.template_filter('format_number')
 def format_number(value):
     """Format value as number with commas."""
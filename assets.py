@@ -0,0 +1,224 @@
+"""
+Static Asset Pipeline
+Vendors the front-end libraries, builds minified, content-hashed and pre-compressed copies
+of everything under static/, and serves them with immutable cache headers.
+
+Usage: python assets.py fetch   # download vendor libraries into static/vendor/
+       python assets.py build   # write static/dist/ and its manifest
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import sys
+from typing import Dict, Optional
+
+from flask import Flask, abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped without brotli
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+JSDELIVR = 'https://cdn.jsdelivr.net/npm'
+
+# static/ path -> upstream URL; templates fall back to the URL until fetched
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css': f'{JSDELIVR}/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js': f'{JSDELIVR}/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.css': f'{JSDELIVR}/bootstrap-icons@1.11.0/font/bootstrap-icons.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2': f'{JSDELIVR}/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff': f'{JSDELIVR}/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff',
+    'vendor/chart.js/chart.umd.min.js': f'{JSDELIVR}/chart.js@4.4.0/dist/chart.umd.min.js',
+}
+
+# Hashed files never change, so clients may cache them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Text assets that get .gz/.br variants (fonts and images are already compressed)
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map')
+
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def fetch_vendor(force: bool = False) -> bool:
+    """Download VENDOR_ASSETS into static/; returns False if any download failed."""
+    import requests
+
+    ok = True
+    for path, url in VENDOR_ASSETS.items():
+        target = os.path.join(STATIC_DIR, path)
+        if os.path.exists(target) and not force:
+            continue
+        try:
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            ok = False
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(response.content)
+    return ok
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def _rewrite_css_urls(css: str, css_path: str, manifest: Dict[str, str]) -> str:
+    """Point relative url(...) references at the hashed files already built."""
+    base = posixpath.dirname(css_path)
+    dist_base = posixpath.dirname(manifest_target(css_path))
+
+    def replace(match):
+        reference = match.group(2)
+        if re.match(r'^(data:|[a-z]+://|//|#)', reference):
+            return match.group(0)
+        path = re.split(r'[?#]', reference, maxsplit=1)[0]
+        target = manifest.get(posixpath.normpath(posixpath.join(base, path)))
+        if target is None:
+            return match.group(0)
+        return f'url("{posixpath.relpath(target, dist_base)}")'
+
+    return CSS_URL.sub(replace, css)
+
+
+def manifest_target(path: str) -> str:
+    """dist/ directory a static/ path is built into (filename added after hashing)."""
+    return posixpath.join('dist', path)
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """
+    Build static/dist/: minify CSS, rewrite CSS url() references, add a
+    content hash to every filename and write .gz/.br variants of text
+    assets. Returns the manifest of static/ path -> hashed static/ path.
+    """
+    dist_dir = os.path.join(static_dir, 'dist')
+    sources = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for name in files:
+            sources.append(os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/'))
+    # CSS last, so the files it references already have hashed names
+    sources.sort(key=lambda p: (p.endswith('.css'), p))
+
+    manifest: Dict[str, str] = {}
+    for path in sources:
+        with open(os.path.join(static_dir, path), 'rb') as f:
+            data = f.read()
+        if path.endswith('.css'):
+            css = data.decode('utf-8')
+            if not path.endswith('.min.css'):
+                css = minify_css(css)
+            data = _rewrite_css_urls(css, path, manifest).encode('utf-8')
+
+        stem, ext = posixpath.splitext(posixpath.basename(path))
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        target = posixpath.join(posixpath.dirname(manifest_target(path)), f'{stem}.{digest}{ext}')
+        output = os.path.join(static_dir, target)
+        _write(output, data)
+        if ext in PRECOMPRESS_EXTENSIONS:
+            _write(output + '.gz', gzip.compress(data, compresslevel=9))
+            if brotli is not None:
+                _write(output + '.br', brotli.compress(data))
+        manifest[path] = target
+
+    tmp_path = os.path.join(dist_dir, 'manifest.json.tmp')
+    _write(tmp_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    os.replace(tmp_path, os.path.join(dist_dir, 'manifest.json'))
+    return manifest
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, str]:
+    """Built manifest, or {} when the build step hasn't run."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_manifest: Dict[str, str] = {}
+
+
+def asset_url(filename: str) -> str:
+    """
+    URL for a static/ path: its hashed build if built, the plain static
+    file if present, else the upstream CDN URL for vendor libraries.
+    """
+    if filename in _manifest or os.path.exists(os.path.join(STATIC_DIR, filename)):
+        return url_for('static', filename=filename)
+    return VENDOR_ASSETS.get(filename, url_for('static', filename=filename))
+
+
+def _precompressed(path: str) -> Optional[str]:
+    """Encoding of the best pre-compressed variant of path the client accepts."""
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in request.accept_encodings and os.path.isfile(path + suffix):
+            return encoding
+    return None
+
+
+def init_assets(app: Flask) -> None:
+    """
+    Serve built assets: url_for('static', filename=...) resolves to the hashed
+    file when one exists, and hashed files are sent pre-compressed with
+    immutable caching. Without a build, static files are served as before.
+    """
+    global _manifest
+    _manifest = load_manifest()
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.url_defaults
+    def hashed_static_filename(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in _manifest:
+            values['filename'] = _manifest[values['filename']]
+
+    @app.route('/static/dist/<path:filename>')
+    def dist_asset(filename):
+        path = safe_join(DIST_DIR, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = _precompressed(path)
+        suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+        response = send_file(path + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command == 'fetch':
+        # A failed download is not fatal: pages fall back to the CDN URLs
+        fetch_vendor(force='--force' in sys.argv)
+    elif command == 'build':
+        print(f"Built {len(build())} assets into {DIST_DIR}")
+    else:
+        sys.exit(f"Unknown command: {command} (expected fetch or build)")
@@ -0,0 +1,101 @@
+"""
+SDMX Decoder Benchmark
+Times decode_sdmx_observations/parse_sdmx_data against the original row-by-row parser
+on synthetic SDMX-JSON payloads.
+
+Usage: python benchmarks/bench_sdmx.py [n_obs ...]
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_fetcher import decode_sdmx_observations, parse_sdmx_data  # noqa: E402
+
+
+def make_sdmx_payload(n_obs: int, n_measures: int = 3, n_regions: int = 9) -> Dict:
+    """
+    Build a synthetic SDMX-JSON 2.0 payload shaped like the MHSI query
+    (MEASURE.CATEGORY.TSEST.REGION.FREQ plus TIME_PERIOD) with about n_obs observations.
+    """
+    n_months = max(1, n_obs // (n_measures * n_regions))
+    months = [f"{2000 + m // 12:04d}-{m % 12 + 1:02d}" for m in range(n_months)]
+    dimensions = [
+        {'id': 'MEASURE', 'values': [{'id': str(7 + i), 'name': f'Measure {7 + i}'} for i in range(n_measures)]},
+        {'id': 'CATEGORY', 'values': [{'id': '2', 'name': 'Food'}]},
+        {'id': 'TSEST', 'values': [{'id': '10', 'name': 'Seasonally Adjusted'}]},
+        {'id': 'REGION', 'values': [{'id': f'R{i}', 'name': f'Region {i}'} for i in range(n_regions)]},
+        {'id': 'FREQ', 'values': [{'id': 'M', 'name': 'Monthly'}]},
+        {'id': 'TIME_PERIOD', 'values': [{'id': m, 'name': m} for m in months]},
+    ]
+    observations = {}
+    for measure in range(n_measures):
+        for region in range(n_regions):
+            for month in range(n_months):
+                observations[f"{measure}:0:0:{region}:0:{month}"] = [11000.0 + month + region, 0]
+    return {
+        'data': {
+            'structure': {'dimensions': {'observation': dimensions}},
+            'structures': [{'dimensions': {'observation': dimensions}}],
+            'dataSets': [{'observations': observations}],
+        }
+    }
+
+
+def legacy_parse_sdmx_data(sdmx_json: Dict) -> Optional[pd.DataFrame]:
+    """The original per-observation parser, kept as the benchmark baseline."""
+    structure = sdmx_json['data'].get('structure', {})
+    dimensions = structure.get('dimensions', {}).get('observation', [])
+    time_idx = None
+    for i, dim in enumerate(dimensions):
+        if 'TIME' in dim.get('id', '').upper():
+            time_idx = i
+            break
+    observations = sdmx_json['data']['dataSets'][0]['observations']
+    records = []
+    for obs_key, obs_value in observations.items():
+        key_parts = obs_key.split(':')
+        time_period = None
+        if time_idx < len(key_parts):
+            time_code = key_parts[time_idx]
+            for dim in dimensions:
+                if 'TIME' in dim.get('id', '').upper():
+                    values = dim.get('values', [])
+                    if int(time_code) < len(values):
+                        time_period = values[int(time_code)].get('id')
+                    break
+        value = obs_value[0] if isinstance(obs_value, list) else obs_value
+        if time_period and value is not None:
+            records.append({'month': time_period, 'food_aud_m_sa': float(value)})
+    df = pd.DataFrame(records)
+    return df.sort_values('month').reset_index(drop=True)
+
+
+def best_of(func, *args, repeat: int = 3) -> float:
+    """Best wall-clock time of several runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes: List[int]) -> None:
+    print(f"{'observations':>12} {'legacy':>10} {'decode':>10} {'parse':>10} {'speedup':>8}")
+    for n_obs in sizes:
+        payload = make_sdmx_payload(n_obs)
+        actual = len(payload['data']['dataSets'][0]['observations'])
+        legacy = best_of(legacy_parse_sdmx_data, payload)
+        decode = best_of(decode_sdmx_observations, payload)
+        parse = best_of(parse_sdmx_data, payload)
+        print(f"{actual:>12,} {legacy:>9.3f}s {decode:>9.3f}s {parse:>9.3f}s {legacy / decode:>7.1f}x")
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
@@ -0,0 +1,157 @@
+"""
+Ingestion Check Against a Stub ABS Server
+Serves synthetic MHSI, cube, CPI and household responses from a local HTTP server, each
+after a delay, runs ingest.refresh_sources against it and checks the applied reference data.
+
+Usage: python benchmarks/ingest_stub.py [--delay 0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Point every source at the stub and keep the caches out of data/
+_server = ThreadingHTTPServer(('127.0.0.1', 0), BaseHTTPRequestHandler)
+os.environ['ABS_API_BASE'] = f"http://127.0.0.1:{_server.server_port}/rest/data"
+os.environ.pop('HOUSEHOLDS_URL', None)
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='ingest-stub-')
+
+from bench_sdmx import make_sdmx_payload  # noqa: E402
+import data_fetcher  # noqa: E402
+import hes_data  # noqa: E402
+import ingest  # noqa: E402
+
+CPI_QUARTERS = [f"{year}-Q{q}" for year in range(2015, 2026) for q in range(1, 5)]
+# Index 100 over the 2015-16 base quarters, rising to these by 2025-Q4
+CPI_LATEST = {ingest.CPI_FOOD_KEY: 138.0, ingest.CPI_ALL_GROUPS_KEY: 132.0}
+HOUSEHOLD_YEARS = list(range(2023, 2028))
+# Thousands of households: Australia and one state the parser must not pick
+HOUSEHOLDS_AUS = [10_650.0, 10_830.0, 11_010.0, 11_190.0, 11_370.0]
+HOUSEHOLDS_NSW = [3_400.0, 3_450.0, 3_500.0, 3_550.0, 3_600.0]
+
+
+def sdmx_payload(dimensions: Sequence[Tuple[str, List[str]]], observations: Dict[Tuple[int, ...], float]) -> Dict:
+    """SDMX-JSON with the given (id, codes) dimensions and {code indexes: value} observations."""
+    dims = [{'id': dim_id, 'values': [{'id': code, 'name': code} for code in codes]}
+            for dim_id, codes in dimensions]
+    return {
+        'data': {
+            'structures': [{'dimensions': {'observation': dims}}],
+            'dataSets': [{'observations': {':'.join(map(str, key)): [value, 0]
+                                           for key, value in observations.items()}}],
+        }
+    }
+
+
+def cpi_payload(key: str) -> Dict:
+    base = [i for i, q in enumerate(CPI_QUARTERS) if q in ingest.CPI_BASE_PERIODS]
+    latest = CPI_LATEST[key]
+    values = {}
+    for i in range(len(CPI_QUARTERS)):
+        step = max(i - base[-1], 0) / (len(CPI_QUARTERS) - 1 - base[-1])
+        values[(0, 0, i)] = 100.0 + (latest - 100.0) * step
+    return sdmx_payload([('INDEX', [key.split('.')[1]]), ('REGION', ['50']),
+                         ('TIME_PERIOD', CPI_QUARTERS)], values)
+
+
+def households_payload() -> Dict:
+    values = {}
+    for r, series in enumerate((HOUSEHOLDS_NSW, HOUSEHOLDS_AUS)):
+        for y, value in enumerate(series):
+            values[(r, y)] = value
+    return sdmx_payload([('REGION', ['NSW', 'AUS']), ('TIME_PERIOD', [str(y) for y in HOUSEHOLD_YEARS])],
+                        values)
+
+
+def make_handler(delay: float, requests_seen: List[str]):
+    responses = [
+        (ingest.CPI_FOOD_KEY, cpi_payload(ingest.CPI_FOOD_KEY)),
+        (ingest.CPI_ALL_GROUPS_KEY, cpi_payload(ingest.CPI_ALL_GROUPS_KEY)),
+        ('HH_PROJ', households_payload()),
+        ('HSI_M', make_sdmx_payload(2_000)),
+    ]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            time.sleep(delay)
+            payload = next((p for marker, p in responses if marker in self.path), None)
+            if payload is None:
+                self.send_error(404)
+                return
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(delay: float) -> int:
+    requests_seen: List[str] = []
+    _server.RequestHandlerClass = make_handler(delay, requests_seen)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    failures = []
+
+    def check(name: str, ok: bool, detail: object = '') -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {name} {detail}")
+        if not ok:
+            failures.append(name)
+
+    defaults = (hes_data.get_cpi_reference(), data_fetcher.HOUSEHOLDS)
+    start = time.perf_counter()
+    results = ingest.refresh_sources()
+    elapsed = time.perf_counter() - start
+
+    check('five requests', len(requests_seen) == 5, len(requests_seen))
+    # Sequential fetches would take at least 5 * delay
+    check('sources fetched concurrently', elapsed < 3 * delay, f"{elapsed:.2f}s")
+    check('MHSI history', results['mhsi'] is not None and results['mhsi'][0] is not None)
+    check('cube store', results['cube'] is not None)
+
+    def check_reference(label: str) -> None:
+        reference = hes_data.get_cpi_reference()
+        check(f'{label}: food CPI factor', reference.food_factor == 1.38, reference.food_factor)
+        check(f'{label}: all-groups CPI factor', reference.factor == 1.32, reference.factor)
+        check(f'{label}: target month', reference.target_month == '2025-11', reference.target_month)
+        check(f'{label}: target period label', reference.target_period == 'November 2025',
+              reference.target_period)
+        check(f'{label}: monthly CPI index', reference.index is not None)
+        expected = {y: int(v * ingest.HOUSEHOLDS_UNIT) for y, v in zip(HOUSEHOLD_YEARS, HOUSEHOLDS_AUS)}
+        actual = {y: data_fetcher.HOUSEHOLDS.get(y) for y in HOUSEHOLD_YEARS}
+        check(f'{label}: Australia household counts', actual == expected, actual)
+
+    check_reference('fetched')
+
+    # A worker that never fetched: back to the defaults, then the cached sources
+    hes_data.set_cpi_reference(defaults[0])
+    data_fetcher.HOUSEHOLDS = defaults[1]
+    served = len(requests_seen)
+    ingest.apply_cached_reference_data()
+    check('cached sources applied without requests', len(requests_seen) == served)
+    check_reference('cached')
+
+    print('PASS' if not failures else f"FAILED: {', '.join(failures)}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds before each stub response')
+    args = parser.parse_args()
+    sys.exit(run(args.delay))
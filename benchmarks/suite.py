@@ -0,0 +1,285 @@
+"""
+Performance Benchmark Suite
+Times the ingestion, processing and HES hot paths and the Flask routes, appends each
+run to a results file and fails when a benchmark regresses against recent runs.
+
+Usage: python benchmarks/suite.py [--quick] [--filter TEXT] [--threshold 0.25]
+                                  [--results PATH] [--no-record]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Snapshots written by the routes go to a scratch directory, never to data/
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-data-'))
+
+from bench_sdmx import make_sdmx_payload  # noqa: E402
+import data_fetcher  # noqa: E402
+import forecast  # noqa: E402
+import hes_data  # noqa: E402
+import uncertainty  # noqa: E402
+
+RESULTS_PATH = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+# A benchmark fails when slower than the recent median by more than this fraction
+DEFAULT_THRESHOLD = 0.25
+
+# Recent runs on the same machine that form the comparison baseline
+BASELINE_RUNS = 5
+
+# Differences below this many seconds are treated as noise
+MIN_REGRESSION_SECONDS = 0.0002
+
+SDMX_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+QUICK_SDMX_SIZES = (1_000, 10_000, 100_000)
+
+# name -> zero-argument callable to time
+Benchmark = Tuple[str, Callable[[], object]]
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 3) -> float:
+    """
+    Best per-call time in seconds. Each of `repeat` rounds runs func enough
+    times to take at least min_time (at least once).
+    """
+    start = time.perf_counter()
+    func()
+    single = time.perf_counter() - start
+    number = max(1, int(min_time / max(single, 1e-9)))
+
+    best = single
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def sdmx_benchmarks(sizes) -> List[Benchmark]:
+    benchmarks = []
+    for n_obs in sizes:
+        payload = make_sdmx_payload(n_obs)
+        benchmarks += [
+            (f'sdmx.decode[{n_obs}]', lambda p=payload: data_fetcher.decode_sdmx_observations(p)),
+            (f'sdmx.parse[{n_obs}]', lambda p=payload: data_fetcher.parse_sdmx_data(p)),
+        ]
+    return benchmarks
+
+
+def check_incremental(history: pd.DataFrame, previous: pd.DataFrame) -> None:
+    """Fail the run unless reusing previous gives exactly the full result."""
+    if not data_fetcher.process_data(history, previous=previous).equals(data_fetcher.process_data(history)):
+        raise RuntimeError(f"incremental process_data differs from a full recompute ({len(history)} months)")
+
+
+def process_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    # 36 and 120 months are realistic MHSI history lengths; 108,000 months
+    # spans 1000-01..9999-12, the most that fit in YYYY-MM
+    for n_months in (24, 36, 120, 1_200, 108_000):
+        months = pd.period_range('1000-01', periods=n_months, freq='M').strftime('%Y-%m').tolist()
+        history = pd.DataFrame({
+            'month': months,
+            'food_aud_m_sa': np.random.default_rng(0).uniform(9000, 13000, n_months).round(1)
+        })
+        previous = data_fetcher.process_data(history.iloc[:-1])
+        # A new month, and a revision inside the revision window
+        revised = history.copy()
+        revised.loc[n_months - 3, 'food_aud_m_sa'] += 50.0
+        check_incremental(history, previous)
+        check_incremental(revised, previous)
+        benchmarks += [
+            (f'process.full[{n_months}]', lambda h=history: data_fetcher.process_data(h)),
+            (f'process.incremental[{n_months}]',
+             lambda h=history, p=previous: data_fetcher.process_data(h, previous=p)),
+        ]
+    return benchmarks
+
+
+def hes_benchmarks() -> List[Benchmark]:
+    snapshot = hes_data.get_hes_snapshot()
+    profiles = pd.DataFrame({
+        'household_type': np.resize(snapshot.household_data['household_type'].to_numpy(), 100_000),
+        'income_quintile': np.resize(['1', '2', '3', '4', '5', None], 100_000),
+    })
+    return [
+        ('hes.build_snapshot', hes_data.build_hes_snapshot),
+        ('hes.month_snapshot', lambda: hes_data._build_month_snapshot(snapshot, '2020-06')),
+        ('hes.quintile_table', hes_data._build_income_quintile_data),
+        ('hes.household_table', hes_data._build_household_type_data),
+        ('hes.cross_tab_matrix', lambda: hes_data._build_cross_tabulation_matrix(
+            snapshot.household_data, snapshot.quintile_data, snapshot.cross_tab_factors)),
+        ('hes.get_cross_tabulation_matrix', hes_data.get_cross_tabulation_matrix),
+        ('hes.cross_tab[3 dims]', lambda: hes_data.get_cross_tab(hes_data.CROSS_TAB_DIMENSIONS)),
+        ('hes.snapshot_as_of', lambda: hes_data.get_hes_snapshot('2020-06')),
+        ('hes.estimate_households[100000]', lambda: hes_data.estimate_households(profiles)),
+    ]
+
+
+def uncertainty_benchmarks() -> List[Benchmark]:
+    df = data_fetcher.get_spending_data(use_api=False)
+    snapshot = hes_data.get_hes_snapshot()
+    draws = uncertainty.CHUNK_DRAWS
+    series = uncertainty.series_model(df)
+    quintiles = uncertainty.table_model(snapshot.quintile_data, snapshot.cpi_food_factor)
+    return [
+        (f'uncertainty.series[{draws}]', lambda: uncertainty.simulate(series, draws=draws)),
+        (f'uncertainty.quintiles[{draws}]', lambda: uncertainty.simulate(quintiles, draws=draws)),
+    ]
+
+
+def forecast_benchmarks() -> List[Benchmark]:
+    values = 500 + np.cumsum(np.random.default_rng(0).normal(0, 1, (1_000, 120)), axis=1)
+    previous = forecast.fit(values[:, :-1])
+    return [
+        ('forecast.fit[1000x120]', lambda: forecast.fit(values)),
+        ('forecast.fit_incremental[1000x120]', lambda: forecast.fit(values, previous)),
+        ('forecast.forecast[1000]', lambda: forecast.forecast(previous, list(range(1_000)), '2025-12', '')),
+    ]
+
+
+def route_benchmarks() -> List[Benchmark]:
+    import app as app_module
+
+    # Serve the local data only: the benchmark never touches the network
+    app_module._refresher.start = lambda: None
+    client = app_module.app.test_client()
+    batch = json.dumps([{'household_type': 'One person', 'income_quintile': str(i % 5 + 1)}
+                        for i in range(1_000)])
+
+    def get(path, **headers):
+        return lambda: client.get(path, headers=headers).close()
+
+    return [
+        ('route GET /', get('/')),
+        ('route GET /distribution', get('/distribution')),
+        ('route GET /distribution?as_of', get('/distribution?as_of=2020-06')),
+        ('route GET /methodology', get('/methodology')),
+        ('route GET /data', get('/data')),
+        ('route GET /api/summary', get('/api/summary')),
+        ('route GET /api/chart-data', get('/api/chart-data?months=24')),
+        ('route GET /api/chart-data gzip', get('/api/chart-data?months=24', **{'Accept-Encoding': 'gzip'})),
+        ('route GET /api/data', get('/api/data?limit=100&sort=-month')),
+        ('route GET /api/data/export', get('/api/data/export?format=csv')),
+        ('route GET /api/distribution/quintiles', get('/api/distribution/quintiles')),
+        ('route GET /api/distribution/cross-tab', get('/api/distribution/cross-tab?dims=household_type,income_quintile,age_group')),
+        ('route POST /api/estimate/batch[1000]', lambda: client.post(
+            '/api/estimate/batch', data=batch, content_type='application/json').get_data()),
+    ]
+
+
+def collect(quick: bool) -> List[Benchmark]:
+    return (sdmx_benchmarks(QUICK_SDMX_SIZES if quick else SDMX_SIZES)
+            + process_benchmarks() + hes_benchmarks() + uncertainty_benchmarks()
+            + forecast_benchmarks() + route_benchmarks())
+
+
+def machine_id() -> str:
+    """Results are only compared between runs on the same machine and Python."""
+    return f"{platform.node()}|{platform.machine()}|{platform.python_version()}"
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history: List[Dict], runs: int = BASELINE_RUNS) -> Dict[str, float]:
+    """Median time per benchmark over the last `runs` runs on this machine."""
+    recent = [r for r in history if r.get('machine') == machine_id()][-runs:]
+    times: Dict[str, List[float]] = {}
+    for record in recent:
+        for name, seconds in record['results'].items():
+            times.setdefault(name, []).append(seconds)
+    return {name: statistics.median(values) for name, values in times.items()}
+
+
+def find_regressions(results: Dict[str, float], reference: Dict[str, float],
+                     threshold: float) -> List[Tuple[str, float, float]]:
+    """(name, baseline, current) for every benchmark slower than allowed."""
+    regressions = []
+    for name, seconds in results.items():
+        base = reference.get(name)
+        if base is None:
+            continue
+        if seconds > base * (1 + threshold) and seconds - base > MIN_REGRESSION_SECONDS:
+            regressions.append((name, base, seconds))
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f}ms"
+    return f"{seconds:8.3f}s "
+
+
+def run(quick: bool = False, name_filter: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD,
+        results_path: str = RESULTS_PATH, record: bool = True) -> int:
+    """Run the suite; returns the process exit code (1 on regression)."""
+    reference = baseline(load_history(results_path))
+    results = {}
+
+    print(f"{'benchmark':<52} {'time':>10} {'baseline':>10} {'change':>8}")
+    for name, func in collect(quick):
+        if name_filter and name_filter not in name:
+            continue
+        seconds = measure(func)
+        results[name] = seconds
+        base = reference.get(name)
+        change = f"{(seconds / base - 1) * 100:+7.1f}%" if base else ''
+        print(f"{name:<52} {format_seconds(seconds)} {format_seconds(base) if base else '':>10} {change:>8}")
+
+    if record:
+        os.makedirs(os.path.dirname(results_path), exist_ok=True)
+        with open(results_path, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'machine': machine_id(),
+                'results': results,
+            }) + '\n')
+
+    regressions = find_regressions(results, reference, threshold)
+    for name, base, seconds in regressions:
+        print(f"REGRESSION {name}: {format_seconds(base).strip()} -> {format_seconds(seconds).strip()}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='skip the 10^6 observation payload')
+    parser.add_argument('--filter', dest='name_filter', help='only run benchmarks whose name contains TEXT')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown as a fraction of the baseline (default 0.25)')
+    parser.add_argument('--results', default=RESULTS_PATH, help='results history file (JSON lines)')
+    parser.add_argument('--no-record', dest='record', action='store_false', help="don't append this run")
+    args = parser.parse_args()
+    sys.exit(run(args.quick, args.name_filter, args.threshold, args.results, args.record))
@@ -0,0 +1,80 @@
+"""
+Upstream Circuit Breaker
+Fails fast while the ABS API is down, probing it again with exponential backoff.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+# Consecutive failures that open the circuit
+FAILURE_THRESHOLD = int(os.environ.get('ABS_BREAKER_FAILURES', 3))
+
+# Seconds the circuit stays open before the first probe; doubles after each failed probe
+BASE_BACKOFF = float(os.environ.get('ABS_BREAKER_BACKOFF', 30))
+MAX_BACKOFF = 30 * 60
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Closed: calls pass and consecutive failures are counted. Open: calls
+    are rejected without touching the network. Once the backoff expires a
+    single probe call is let through (half-open); success closes the
+    circuit, failure re-opens it with twice the backoff.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 base_backoff: float = BASE_BACKOFF, max_backoff: float = MAX_BACKOFF):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.opened_at: Optional[float] = None
+        self.next_probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (at most one probe while half-open)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self.next_probe_at:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.failures < self.failure_threshold:
+                return
+            if self.state != OPEN:
+                print(f"Circuit {self.name} open for {self.backoff:.0f}s after {self.failures} failure(s)")
+            self.state = OPEN
+            self.opened_at = self.opened_at or time.monotonic()
+            self.next_probe_at = time.monotonic() + self.backoff
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': max(self.next_probe_at - time.monotonic(), 0) if self.state == OPEN else 0,
+            }
@@ -0,0 +1,122 @@
+"""
+Monthly CPI Index Engine
+Month-resolution food and all-groups CPI factors for rebasing 2015-16 HES values to any month.
+"""
+
+import hashlib
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# HES 2015-16 reference period (July 2015 - June 2016)
+BASE_MONTHS = tuple(f"2015-{m:02d}" for m in range(7, 13)) + tuple(f"2016-{m:02d}" for m in range(1, 7))
+
+
+def month_index(month: str) -> int:
+    """Months since year 0 for a YYYY-MM string."""
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def index_month(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def quarter_to_month(period: str) -> str:
+    """Middle month of a YYYY-Qn period (the quarter's index is its average)."""
+    year, quarter = period[:4], int(period[-1])
+    return f"{year}-{quarter * 3 - 1:02d}"
+
+
+def monthly_series(periods: Sequence[str], values: Sequence[float]) -> pd.Series:
+    """
+    Monthly index from monthly or quarterly observations.
+    Quarterly values sit on the quarter's middle month and months between
+    observations are linearly interpolated.
+    """
+    months = [quarter_to_month(p) if 'Q' in p else p[:7] for p in periods]
+    idx = np.array([month_index(m) for m in months])
+    order = np.argsort(idx)
+    idx, vals = idx[order], np.asarray(values, dtype=float)[order]
+
+    # Extend to the reference year so the 2015-16 base is always defined
+    first = min(idx[0], month_index(BASE_MONTHS[0]))
+    grid = np.arange(first, idx[-1] + 1)
+    return pd.Series(np.interp(grid, idx, vals), index=[index_month(i) for i in grid])
+
+
+class CPIIndex:
+    """
+    Cumulative food and all-groups CPI factors by month, relative to the
+    2015-16 average. Built once; month lookups are a dict hit and
+    rebasing is a vectorized multiply.
+    """
+
+    def __init__(self, food: pd.Series, all_groups: pd.Series):
+        months = food.index.intersection(all_groups.index).sort_values()
+        food = food.loc[months]
+        all_groups = all_groups.loc[months]
+
+        self.months: List[str] = list(months)
+        self.food_factors = (food / food.loc[list(BASE_MONTHS)].mean()).to_numpy()
+        self.all_groups_factors = (all_groups / all_groups.loc[list(BASE_MONTHS)].mean()).to_numpy()
+        self._position = {m: i for i, m in enumerate(self.months)}
+        self.version = hashlib.sha1(
+            self.food_factors.tobytes() + self.all_groups_factors.tobytes() + '|'.join(self.months).encode()
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_anchors(cls, food_factor: float, all_groups_factor: float, target_month: str) -> 'CPIIndex':
+        """
+        Fallback index: flat at 1.0 through 2015-16, then a straight path to
+        the known factors at target_month.
+        """
+        base_end = BASE_MONTHS[-1]
+        return cls(
+            monthly_series([base_end, target_month], [1.0, food_factor]),
+            monthly_series([base_end, target_month], [1.0, all_groups_factor])
+        )
+
+    @property
+    def first_month(self) -> str:
+        return self.months[0]
+
+    @property
+    def last_month(self) -> str:
+        return self.months[-1]
+
+    def factors(self, month: str) -> Tuple[float, float]:
+        """(food, all-groups) factors for a month; ValueError if outside the index."""
+        position = self._position.get(month)
+        if position is None:
+            raise ValueError(f"as_of must be a month between {self.first_month} and {self.last_month}")
+        return float(self.food_factors[position]), float(self.all_groups_factors[position])
+
+    def rebase(self, values_2016: Union[float, np.ndarray], months: Union[str, Sequence[str]],
+               use_food_cpi: bool = True) -> np.ndarray:
+        """
+        Rebase 2015-16 values to the given month(s). values and months
+        broadcast together, so a whole table can be rebased to one month or
+        each row to its own month in a single call.
+        """
+        table = self.food_factors if use_food_cpi else self.all_groups_factors
+        month_list = [months] if isinstance(months, str) else list(months)
+        positions = np.array([self._position.get(m, -1) for m in month_list])
+        if (positions < 0).any():
+            raise ValueError(f"Months must be between {self.first_month} and {self.last_month}")
+        factors = table[positions]
+        if isinstance(months, str):
+            factors = factors[0]
+        return np.asarray(values_2016, dtype=float) * factors
+
+
+def cpi_index_from_sources(food: Optional[pd.DataFrame], all_groups: Optional[pd.DataFrame]) -> Optional[CPIIndex]:
+    """Build an index from ingested (period, value) CPI frames; None if either is missing."""
+    if food is None or all_groups is None or food.empty or all_groups.empty:
+        return None
+    try:
+        return CPIIndex(monthly_series(food['period'], food['value']),
+                        monthly_series(all_groups['period'], all_groups['value']))
+    except (KeyError, ValueError, ZeroDivisionError) as e:
+        print(f"Error building CPI index: {e}")
+        return None
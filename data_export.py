@@ -0,0 +1,125 @@
+"""
+Data Table Pagination and Export
+Paged, sorted and column-selected views of the spending data, plus chunked CSV/NDJSON export.
+"""
+
+import base64
+import io
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from payloads import dumps
+
+TABLE_COLUMNS = [
+    'month',
+    'food_aud_m_sa',
+    'households',
+    'food_per_household_month',
+    'food_per_hh_12m_avg'
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Rows rendered per chunk when streaming an export
+EXPORT_CHUNK_ROWS = 5000
+
+_order_cache: Dict[Tuple[str, str, bool], np.ndarray] = {}
+_order_lock = threading.Lock()
+
+
+def parse_columns(df: pd.DataFrame, columns: Optional[str]) -> List[str]:
+    """Validate a comma-separated column list (default TABLE_COLUMNS)."""
+    if not columns:
+        return [col for col in TABLE_COLUMNS if col in df.columns]
+    selected = [col.strip() for col in columns.split(',') if col.strip()]
+    unknown = [col for col in selected if col not in df.columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    return selected
+
+
+def parse_sort(df: pd.DataFrame, sort: Optional[str]) -> Tuple[str, bool]:
+    """Parse 'column' or '-column' (descending); default is month ascending."""
+    if not sort:
+        return 'month', False
+    descending = sort.startswith('-')
+    column = sort.lstrip('-')
+    if column not in df.columns:
+        raise ValueError(f"Unknown sort column: {column}")
+    return column, descending
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def get_row_order(df: pd.DataFrame, column: str, descending: bool) -> np.ndarray:
+    """Row positions in sort order, cached per data version and sort key."""
+    key = (df.attrs.get('version', ''), column, descending)
+    order = _order_cache.get(key)
+    if order is None:
+        order = np.argsort(df[column].to_numpy(), kind='stable')
+        if descending:
+            order = order[::-1]
+        with _order_lock:
+            if len(_order_cache) > 32:
+                _order_cache.clear()
+            _order_cache[key] = order
+    return order
+
+
+def get_table_page(df: pd.DataFrame, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                   columns: Sequence[str] = TABLE_COLUMNS, sort: str = 'month',
+                   descending: bool = False) -> Dict:
+    """One page of rows plus paging metadata."""
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    order = get_row_order(df, sort, descending)
+    positions = order[offset:offset + limit]
+
+    page = df.iloc[positions][list(columns)]
+    next_offset = offset + len(positions) if offset + len(positions) < len(df) else None
+    return {
+        'total': len(df),
+        'offset': offset,
+        'limit': limit,
+        'columns': list(columns),
+        'sort': f"{'-' if descending else ''}{sort}",
+        'next_offset': next_offset,
+        'next_cursor': encode_cursor(next_offset) if next_offset is not None else None,
+        'rows': page.to_dict('records'),
+    }
+
+
+def iter_export(df: pd.DataFrame, fmt: str = 'csv', columns: Sequence[str] = TABLE_COLUMNS,
+                sort: Optional[str] = 'month', descending: bool = False,
+                chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Yield the table as CSV or NDJSON, EXPORT_CHUNK_ROWS rows at a time.
+    With sort=None rows keep their existing order.
+    """
+    order = get_row_order(df, sort, descending) if sort else np.arange(len(df))
+    columns = list(columns)
+
+    if fmt == 'csv':
+        yield (','.join(columns) + '\n').encode()
+
+    for start in range(0, len(order), chunk_rows):
+        chunk = df.iloc[order[start:start + chunk_rows]][columns]
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, header=False, index=False)
+            yield buffer.getvalue().encode()
+        else:
+            yield b''.join(dumps(row) + b'\n' for row in chunk.to_dict('records'))
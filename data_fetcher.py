@@ -3,14 +3,61 @@ ABS MHSI Data Fetcher and Processor
 Fetches Monthly Household Spending Indicator data and calculates per-household estimates.
 """
 
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+
+from circuit_breaker import CircuitBreaker
+from data_store import DATA_DIR, load_snapshot, save_snapshot, snapshot_age
+from metrics import dataflow_label, record_upstream, registry, timed_stage
+from vintage_store import FOOD_SERIES, record_vintage
 
 # Configuration
-API_URL = "https://data.api.abs.gov.au/rest/data/ABS,HSI_M,1.6.0/7+8+9.2.10.AUS.M?startPeriod=2024-01&dimensionAtObservation=AllDimensions"
+# ABS_API_BASE can point the app at a mirror or a local stub server
+ABS_API_BASE = os.environ.get('ABS_API_BASE', 'https://data.api.abs.gov.au/rest/data')
+API_DATAFLOW_URL = f"{ABS_API_BASE}/ABS,HSI_M,1.6.0"
+API_KEY = "7+8+9.2.10.AUS.M"
+
+# Series used for food_aud_m_sa: the first code requested in each key dimension
+FOOD_SERIES_KEY = tuple(part.split('+')[0] for part in API_KEY.split('.'))
+API_START_PERIOD = '2024-01'
+
+# Stored months re-requested on every refresh so ABS revisions are picked up
+REVISION_WINDOW_MONTHS = 6
+
+# Interpolate household counts between years instead of an annual step
+HOUSEHOLD_INTERPOLATION = os.environ.get('HOUSEHOLD_INTERPOLATION', '').lower() in ('1', 'true', 'yes')
+
+# Months in the rolling per-household average
+ROLLING_WINDOW = 12
+
+# Shorter processed series are recomputed in full: they are mostly inside the
+# revision and rolling windows, so few rows could be reused. The MHSI history
+# (monthly since API_START_PERIOD) passes this; benchmarks/suite.py checks
+# the incremental and full results match at these sizes
+INCREMENTAL_MIN_ROWS = 2 * ROLLING_WINDOW
+
+# Columns produced by process_data
+PROCESSED_COLUMNS = ['month', 'food_aud_m_sa', 'households', 'food_aud_sa',
+                     'food_per_household_month', 'food_per_hh_12m_avg']
+
+# Raw MHSI observations fetched so far, with the HTTP validators of the last response
+HISTORY_PATH = os.path.join(DATA_DIR, 'mhsi_history')
+
+
+def build_api_url(start_period: str = API_START_PERIOD, key: str = API_KEY) -> str:
+    """Build the MHSI data query URL for a series key, starting at start_period (YYYY-MM)."""
+    return f"{API_DATAFLOW_URL}/{key}?startPeriod={start_period}&dimensionAtObservation=AllDimensions"
+
+
+API_URL = build_api_url()
 
 HOUSEHOLDS = {
     2023: 10_600_000,
@@ -35,146 +82,526 @@ MANUAL_DATA = {
 }
 
 
-def fetch_abs_data(url: str = API_URL) -> Optional[Dict]:
-    """Fetch SDMX-JSON data from ABS API."""
+# Default per-request timeout (seconds) for ABS API calls
+API_TIMEOUT = 30
+
+# Retries of a failed ABS request (connection errors, 429 and 5xx)
+HTTP_RETRIES = 2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+
+# Most wall-clock seconds one ABS call may take: every attempt, backoff and body read
+ABS_LATENCY_BUDGET = float(os.environ.get('ABS_LATENCY_BUDGET', 20))
+
+# Shared by every ABS dataflow: they are served by the same endpoint
+abs_breaker = CircuitBreaker('abs')
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Shared HTTP session with connection pooling (retries are made by the caller)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class DeadlineExceeded(requests.Timeout):
+    """An ABS call ran past ABS_LATENCY_BUDGET."""
+
+
+def _remaining(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"ABS request exceeded {ABS_LATENCY_BUDGET:g}s")
+    return remaining
+
+
+def _get_within(url: str, headers: Dict[str, str], timeout: float, deadline: float) -> requests.Response:
+    """
+    GET with up to HTTP_RETRIES retries on connection errors and
+    RETRY_STATUSES. Each attempt's timeout and each backoff sleep is capped
+    by the time left before deadline. The response body is not read yet.
+    """
+    session = get_http_session()
+    for attempt in range(HTTP_RETRIES + 1):
+        last = attempt == HTTP_RETRIES
+        attempt_timeout = min(timeout, _remaining(deadline))
+        try:
+            response = session.get(url, headers=headers, stream=True, timeout=attempt_timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                raise
+        else:
+            if last or response.status_code not in RETRY_STATUSES:
+                return response
+            response.close()
+        time.sleep(min(RETRY_BACKOFF * 2 ** attempt, _remaining(deadline)))
+
+
+def _read_within(response: requests.Response, deadline: float) -> bytes:
+    """
+    Read a streamed (decoded) body, giving up once deadline has passed.
+    read1 returns whatever has arrived, so a slowly trickling body is
+    checked against the deadline as it comes in.
+    """
+    read = getattr(response.raw, 'read1', response.raw.read)
+    chunks = []
+    while True:
+        chunk = read(64 * 1024, decode_content=True)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+        _remaining(deadline)
+
+
+def fetch_abs_data_conditional(url: str = API_URL,
+                               etag: Optional[str] = None,
+                               last_modified: Optional[str] = None,
+                               timeout: float = API_TIMEOUT) -> Tuple[int, Optional[Dict], Dict[str, str]]:
+    """
+    Fetch SDMX-JSON data from ABS API, sending validators from a previous response.
+    Returns (status_code, json, validators); status 304 means unchanged
+    (json is None) and status 0 means the request failed or was rejected
+    by the open circuit breaker. timeout applies to each connect and read;
+    the whole call, retries and body included, must finish within
+    ABS_LATENCY_BUDGET or it fails and counts against the breaker.
+    """
+    if not abs_breaker.allow():
+        registry.inc('upstream_rejected_total', {'dataflow': dataflow_label(url)})
+        return 0, None, {}
+    
     headers = {
         'Accept': 'application/vnd.sdmx.data+json;version=2.0.0',
         'Accept-Encoding': 'gzip, deflate',
     }
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
     
+    start = time.perf_counter()
+    deadline = time.monotonic() + ABS_LATENCY_BUDGET
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with _get_within(url, headers, timeout, deadline) as response:
+            if response.status_code == 304:
+                abs_breaker.record_success()
+                record_upstream(dataflow_label(url), time.perf_counter() - start, ok=True)
+                return 304, None, {'etag': etag or '', 'last_modified': last_modified or ''}
+            response.raise_for_status()
+            validators = {
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+            }
+            payload = json.loads(_read_within(response, deadline))
+        abs_breaker.record_success()
+        record_upstream(dataflow_label(url), time.perf_counter() - start, ok=True)
+        return response.status_code, payload, validators
     except Exception as e:
+        # A 4xx means the API is up and rejected this query; only outages trip the breaker
+        client_error = isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code < 500
+        if client_error:
+            abs_breaker.record_success()
+        else:
+            abs_breaker.record_failure()
+        record_upstream(dataflow_label(url), time.perf_counter() - start, ok=False)
         print(f"Error fetching ABS data: {e}")
-        return None
+        return 0, None, {}
 
 
-def parse_sdmx_data(sdmx_json: Dict) -> Optional[pd.DataFrame]:
-    """Parse SDMX-JSON 2.0 format and extract observations."""
+def fetch_abs_data(url: str = API_URL, timeout: float = API_TIMEOUT) -> Optional[Dict]:
+    """Fetch SDMX-JSON data from ABS API."""
+    _, payload, _ = fetch_abs_data_conditional(url, timeout=timeout)
+    return payload
+
+
+def _split_observation_keys(keys: List[str], n_dims: int) -> np.ndarray:
+    """
+    Split 'a:b:c:d' observation keys into an (n_obs, n_dims) integer array.
+    Works on the joined key bytes in bulk instead of splitting each key.
+    """
+    raw = np.frombuffer((':'.join(keys) + ':').encode('ascii'), dtype=np.uint8)
+    ends = np.flatnonzero(raw == ord(':'))
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts
+    digits = raw - np.uint8(ord('0'))
+    
+    codes = digits[starts].astype(np.int32)
+    for k in range(1, int(lengths.max())):
+        idx = np.flatnonzero(lengths > k)
+        codes[idx] = codes[idx] * 10 + digits[starts[idx] + k]
+    
+    return codes.reshape(-1, n_dims)
+
+
+def _get_sdmx_structure(sdmx_json: Dict) -> Dict:
+    """Structure block for SDMX-JSON 2.0 ('structures') or 1.0 ('structure')."""
+    data = sdmx_json['data']
+    structures = data.get('structures')
+    if structures:
+        return structures[0]
+    return data.get('structure', {})
+
+
+@timed_stage('sdmx_decode')
+def decode_sdmx_observations(sdmx_json: Dict, with_labels: bool = False) -> Optional[pd.DataFrame]:
+    """
+    Decode SDMX-JSON observations (dimensionAtObservation=AllDimensions)
+    into a tidy frame: one categorical column per dimension holding the
+    dimension code ids, plus 'value'. With with_labels, a '<DIM>_label'
+    column with the code names is added for each dimension.
+    """
     if not sdmx_json or 'data' not in sdmx_json:
         return None
     
     try:
-        structure = sdmx_json['data'].get('structure', {})
-        dimensions = structure.get('dimensions', {}).get('observation', [])
-        
-        # Find TIME_PERIOD dimension
-        time_idx = None
-        for i, dim in enumerate(dimensions):
-            if 'TIME' in dim.get('id', '').upper():
-                time_idx = i
-                break
-        
-        if time_idx is None:
-            return None
-        
-        # Extract observations
+        dimensions = _get_sdmx_structure(sdmx_json).get('dimensions', {}).get('observation', [])
         datasets = sdmx_json['data'].get('dataSets', [])
-        if not datasets:
+        if not dimensions or not datasets:
             return None
         
         observations = datasets[0].get('observations', {})
         if not observations:
             return None
         
-        # Parse observations
-        records = []
-        for obs_key, obs_value in observations.items():
-            key_parts = obs_key.split(':')
-            
-            # Get time period
-            time_period = None
-            if time_idx < len(key_parts):
-                time_code = key_parts[time_idx]
-                for dim in dimensions:
-                    if 'TIME' in dim.get('id', '').upper():
-                        values = dim.get('values', [])
-                        if int(time_code) < len(values):
-                            time_period = values[int(time_code)].get('id')
-                        break
-            
-            # Get value
-            value = obs_value[0] if isinstance(obs_value, list) else obs_value
-            
-            if time_period and value is not None:
-                records.append({
-                    'month': time_period,
-                    'food_aud_m_sa': float(value)
-                })
+        codes = _split_observation_keys(list(observations.keys()), len(dimensions))
+        values = np.array(
+            [obs[0] if isinstance(obs, list) else obs for obs in observations.values()],
+            dtype=float
+        )
         
-        if not records:
-            return None
+        columns = {}
+        for i, dim in enumerate(dimensions):
+            dim_values = dim.get('values', [])
+            ids = [v.get('id') for v in dim_values]
+            columns[dim['id']] = pd.Categorical.from_codes(codes[:, i], categories=ids)
+            if with_labels:
+                names = [v.get('name', v.get('id')) for v in dim_values]
+                labels = np.array(names, dtype=object)
+                columns[f"{dim['id']}_label"] = labels[codes[:, i]]
+        columns['value'] = values
         
-        df = pd.DataFrame(records)
-        return df.sort_values('month').reset_index(drop=True)
+        df = pd.DataFrame(columns)
+        return df[~np.isnan(values)].reset_index(drop=True)
         
     except Exception as e:
-        print(f"Error parsing SDMX data: {e}")
+        print(f"Error decoding SDMX data: {e}")
         return None
 
 
+def _time_dimension(df: pd.DataFrame) -> Optional[str]:
+    """Name of the time dimension column in a decoded frame."""
+    for col in df.columns:
+        if 'TIME' in col.upper() and not col.endswith('_label'):
+            return col
+    return None
+
+
+@timed_stage('sdmx_parse')
+def parse_sdmx_data(sdmx_json: Dict) -> Optional[pd.DataFrame]:
+    """
+    Parse SDMX-JSON into the single food spending series (month, food_aud_m_sa).
+    Where the response holds several series (e.g. the 7+8+9 measures), rows
+    are narrowed to FOOD_SERIES_KEY, so there is exactly one row per month.
+    """
+    df = decode_sdmx_observations(sdmx_json)
+    if df is None or df.empty:
+        return None
+    
+    time_col = _time_dimension(df)
+    if time_col is None:
+        return None
+    
+    series_dims = [col for col in df.columns if col not in (time_col, 'value')]
+    for dim, wanted in zip(series_dims, FOOD_SERIES_KEY):
+        present = set(df[dim].unique())
+        if len(present) > 1:
+            code = wanted if wanted in present else df[dim].iloc[0]
+            df = df[df[dim] == code]
+    
+    df = pd.DataFrame({
+        'month': df[time_col].astype(str).to_numpy(dtype=object),
+        'food_aud_m_sa': df['value'].to_numpy()
+    })
+    df = df.drop_duplicates('month', keep='last')
+    return df.sort_values('month').reset_index(drop=True)
+
+
+def shift_month(month_str: str, months: int) -> str:
+    """Shift a YYYY-MM string by a number of months."""
+    year, month = int(month_str[:4]), int(month_str[5:7])
+    index = year * 12 + (month - 1) + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def merge_history(history: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge newly fetched observations into stored history.
+    Months present in the new data replace the stored rows (ABS revisions).
+    """
+    if history is None or history.empty:
+        merged = new
+    else:
+        kept = history[~history['month'].isin(new['month'])]
+        merged = pd.concat([kept, new], ignore_index=True)
+    return merged.sort_values('month', kind='stable').reset_index(drop=True)
+
+
+def load_history(history_path: str = HISTORY_PATH) -> Optional[pd.DataFrame]:
+    """Stored MHSI history (None if there is none), with attrs['fetched_at'] from the file time."""
+    history = load_snapshot(history_path)
+    if history is None or history.empty:
+        return None
+    age = snapshot_age(history_path) or 0.0
+    history.attrs['fetched_at'] = datetime.fromtimestamp(time.time() - age).isoformat(timespec='seconds')
+    return history
+
+
+def fetch_incremental(history_path: str = HISTORY_PATH,
+                      timeout: float = API_TIMEOUT) -> Tuple[Optional[pd.DataFrame], str]:
+    """
+    Refresh the stored MHSI history with only the recent periods.
+
+    Requests months from REVISION_WINDOW_MONTHS before the last stored
+    month, conditionally on the validators of the previous response.
+    Returns (history, status) where status is 'updated', 'not_modified'
+    or 'error'; on error the previously stored history is returned.
+    history.attrs['fetched_at'] is when ABS last confirmed the history.
+    """
+    history = load_history(history_path)
+    if history is not None:
+        start_period = max(API_START_PERIOD, shift_month(history['month'].max(), -REVISION_WINDOW_MONTHS))
+    else:
+        start_period = API_START_PERIOD
+    url = build_api_url(start_period)
+    
+    # Validators only apply to the exact query they were returned for
+    etag = last_modified = None
+    if history is not None and history.attrs.get('url') == url:
+        etag = history.attrs.get('etag') or None
+        last_modified = history.attrs.get('last_modified') or None
+    
+    status, payload, validators = fetch_abs_data_conditional(url, etag, last_modified, timeout=timeout)
+    if status == 304:
+        # Unchanged upstream: the stored history is confirmed current as of now
+        try:
+            os.utime(history_path)
+        except OSError:
+            pass
+        history.attrs['fetched_at'] = datetime.now().isoformat(timespec='seconds')
+        return history, 'not_modified'
+    
+    new = parse_sdmx_data(payload) if payload else None
+    if new is None:
+        return history, 'error'
+    
+    record_vintage(pd.DataFrame({'series': FOOD_SERIES, 'month': new['month'], 'value': new['food_aud_m_sa']}),
+                   validators)
+    merged = merge_history(history, new[['month', 'food_aud_m_sa']])
+    try:
+        save_snapshot(merged, history_path, extra_meta={'url': url, **validators})
+    except OSError as e:
+        print(f"Error saving MHSI history: {e}")
+    merged.attrs['fetched_at'] = datetime.now().isoformat(timespec='seconds')
+    return merged, 'updated'
+
+
 def load_manual_data() -> pd.DataFrame:
     """Load manual data as fallback."""
     return pd.DataFrame(MANUAL_DATA)
 
 
+def set_household_counts(counts: Dict[int, int]) -> None:
+    """
+    Merge ingested counts into HOUSEHOLDS. A new dict is swapped in, so
+    readers iterating the current one never see it change.
+    """
+    global HOUSEHOLDS
+    if counts:
+        HOUSEHOLDS = {**HOUSEHOLDS, **counts}
+
+
 def get_household_count(month_str: str) -> int:
     """Get household count for a given month using annual step function."""
     year = int(month_str[:4])
     return HOUSEHOLDS.get(year, 11_000_000)  # Default to 2025 if unknown
 
 
-def process_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Process food spending data and calculate per-household values."""
-    df = df.copy()
-    
-    # Add household counts
-    df['households'] = df['month'].apply(get_household_count)
-    
-    # Convert to AUD$ and calculate per-household
-    df['food_aud_sa'] = df['food_aud_m_sa'] * 1_000_000
-    df['food_per_household_month'] = (
-        df['food_aud_sa'] / df['households']
-    ).round(2)
-    
+def _month_numbers(months) -> Tuple[np.ndarray, np.ndarray]:
+    """(year, month) integer arrays for YYYY-MM strings, parsed in bulk."""
+    chars = np.asarray(months, dtype='U7').view(np.uint32).reshape(-1, 7).astype(np.int64) - ord('0')
+    years = chars[:, 0] * 1000 + chars[:, 1] * 100 + chars[:, 2] * 10 + chars[:, 3]
+    return years, chars[:, 5] * 10 + chars[:, 6]
+
+
+def household_counts_for(months, interpolate: bool = HOUSEHOLD_INTERPOLATION) -> np.ndarray:
+    """
+    Household counts for many YYYY-MM months at once.
+    By default each year's count applies to all its months (unknown years
+    get 11M). With interpolate, counts are placed at mid-year and months in
+    between are interpolated linearly (clamped outside the known years).
+    """
+    years, month = _month_numbers(months)
+    households = HOUSEHOLDS
+    known = np.array(sorted(households), dtype=np.int64)
+    counts = np.array([households[y] for y in known], dtype=np.int64)
+    if not len(known):
+        return np.full(len(years), 11_000_000, dtype=np.int64)
+
+    if interpolate:
+        month_num = years * 12 + month - 1
+        return np.interp(month_num, known * 12 + 6, counts).round().astype(np.int64)
+
+    position = np.searchsorted(known, years).clip(0, len(known) - 1)
+    return np.where(known[position] == years, counts[position], 11_000_000)
+
+
+def households_key(interpolate: bool) -> str:
+    """Identifies the household counts a processed frame was derived from."""
+    return f"{sorted(HOUSEHOLDS.items())}|{interpolate}"
+
+
+def _derive_columns(month: np.ndarray, food: np.ndarray, interpolate: bool) -> Dict[str, np.ndarray]:
+    """Household count and per-household columns for (sorted) rows."""
+    households = household_counts_for(month, interpolate)
+    food_aud_sa = food * 1_000_000
+    return {
+        'month': month,
+        'food_aud_m_sa': food,
+        'households': households,
+        'food_aud_sa': food_aud_sa,
+        'food_per_household_month': (food_aud_sa / households).round(2),
+    }
+
+
+def _reusable_rows(previous: pd.DataFrame, month: np.ndarray, food: np.ndarray) -> int:
+    """
+    Leading rows of previous that are unchanged in (month, food).
+    Refreshes only re-request months from REVISION_WINDOW_MONTHS before the
+    last stored month, so only that window of previous is compared; the
+    rows before it are reused when the data still lines up with them.
+    """
+    prev_month = previous['month'].to_numpy()
+    n = len(prev_month)
+    if not n or len(month) < n:
+        return 0
+    window = int(np.searchsorted(prev_month, shift_month(prev_month[-1], -REVISION_WINDOW_MONTHS)))
+    if window and (month[0] != prev_month[0] or month[window - 1] != prev_month[window - 1]):
+        return 0
+    same = (month[window:n] == prev_month[window:]) & (food[window:n] == previous['food_aud_m_sa'].to_numpy()[window:])
+    changed = np.flatnonzero(~same)
+    return window + int(changed[0]) if len(changed) else n
+
+
+def _trailing_mean(values: np.ndarray, skip: int = 0) -> np.ndarray:
+    """
+    Mean of the non-missing values in each ROLLING_WINDOW-month window
+    ending at every position from skip on (like rolling(min_periods=1)).
+    Each window is summed on its own, so a tail recomputed from its context
+    rounds exactly like a full recompute.
+    """
+    padded = np.concatenate([np.full(ROLLING_WINDOW - 1, np.nan), values.astype(float)])
+    observed = ~np.isnan(padded)
+    padded[~observed] = 0.0
+    n = len(values) - skip
+    sums = np.zeros(n)
+    counts = np.zeros(n)
+    for k in range(skip, skip + ROLLING_WINDOW):
+        sums += padded[k:k + n]
+        counts += observed[k:k + n]
+    return np.divide(sums, counts, out=np.full(n, np.nan), where=counts > 0)
+
+
+@timed_stage('process_data')
+def process_data(df: pd.DataFrame, previous: Optional[pd.DataFrame] = None,
+                 interpolate: bool = HOUSEHOLD_INTERPOLATION) -> pd.DataFrame:
+    """
+    Process food spending data and calculate per-household values.
+
+    previous is an earlier result of process_data for the same series. When
+    it has at least INCREMENTAL_MIN_ROWS rows and the same household counts,
+    its rows before the first new or revised month are reused; only the
+    remaining rows are derived, and the rolling average is recomputed for
+    those rows from the preceding ROLLING_WINDOW - 1 values.
+    """
+    month = df['month'].to_numpy(dtype=object)
+    food = df['food_aud_m_sa'].to_numpy()
+    if not df['month'].is_monotonic_increasing:
+        order = np.argsort(month.astype(str), kind='stable')
+        month, food = month[order], food[order]
+    key = households_key(interpolate)
+
+    start = 0
+    if (previous is not None and len(previous) >= INCREMENTAL_MIN_ROWS
+            and previous.attrs.get('households_key') == key):
+        start = _reusable_rows(previous, month, food)
+
+    columns = _derive_columns(month[start:], food[start:], interpolate)
+    per_household = columns['food_per_household_month']
+    context = min(start, ROLLING_WINDOW - 1)
+    if context:
+        # Values before the first new row that still fall in its window
+        per_household = np.concatenate([
+            previous['food_per_household_month'].to_numpy()[start - context:start], per_household])
+
     # 12-month rolling average
-    df = df.sort_values('month').reset_index(drop=True)
-    df['food_per_hh_12m_avg'] = (
-        df['food_per_household_month']
-        .rolling(window=12, min_periods=1)
-        .mean()
-        .round(2)
-    )
-    
-    return df
+    columns['food_per_hh_12m_avg'] = _trailing_mean(per_household, context).round(2)
 
+    if start:
+        columns = {col: np.concatenate([previous[col].to_numpy()[:start], columns[col]])
+                   for col in PROCESSED_COLUMNS}
+    result = pd.DataFrame(columns)  # already in PROCESSED_COLUMNS order
+    result.attrs['households_key'] = key
+    return result
 
-def get_spending_data(use_api: bool = True) -> pd.DataFrame:
+
+@timed_stage('build_spending_data')
+def build_spending_data(history: Optional[pd.DataFrame],
+                        previous: Optional[pd.DataFrame] = None,
+                        status: str = 'updated') -> pd.DataFrame:
     """
-    Main function to get processed spending data.
-    Tries API first, falls back to manual data.
+    Process fetched MHSI history, or the manual data when there is none.
+    previous (the data currently served) lets unchanged API months be reused.
+    status is fetch_incremental's: history kept after a failed fetch is
+    tagged 'api_stale' and keeps the time it was last fetched.
     """
-    df = None
-    data_source = "manual"
-    
-    if use_api:
-        sdmx_data = fetch_abs_data()
-        if sdmx_data:
-            df = parse_sdmx_data(sdmx_data)
-            if df is not None:
-                data_source = "api"
-    
-    if df is None:
+    if history is not None:
+        df = history[['month', 'food_aud_m_sa']]
+        data_source = "api_stale" if status == 'error' else "api"
+    else:
         df = load_manual_data()
+        data_source = "manual"
     
-    df = process_data(df)
+    if previous is not None and (history is None or not str(previous['data_source'].iat[0]).startswith('api')):
+        previous = None  # rows of a different series (manual data) are never reused
+    df = process_data(df, previous=previous)
     df['data_source'] = data_source
+    if history is not None and history.attrs.get('fetched_at'):
+        df.attrs['fetched_at'] = history.attrs['fetched_at']
     
     return df
 
 
+@timed_stage('get_spending_data')
+def get_spending_data(use_api: bool = True) -> pd.DataFrame:
+    """
+    Main function to get processed spending data.
+    Tries API first, falls back to manual data.
+    """
+    history, status = fetch_incremental() if use_api else (None, 'error')
+    return build_spending_data(history, status=status)
+
+
 def get_summary_stats(df: pd.DataFrame) -> Dict:
     """Calculate summary statistics for the dashboard."""
     latest = df.iloc[-1]
@@ -202,6 +629,7 @@ def get_summary_stats(df: pd.DataFrame) -> Dict:
         'ytd_2025': avg_2025,
         'yoy_growth': yoy_growth,
         'data_source': latest.get('data_source', 'unknown'),
+        'data_fetched_at': df.attrs.get('fetched_at'),
         'total_months': len(df)
     }
 
@@ -0,0 +1,173 @@
+"""
+On-Disk Dataset Snapshots
+Columnar snapshots of processed spending data shared by all workers on a host.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows
+    fcntl = None
+
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+SNAPSHOT_PATH = os.path.join(DATA_DIR, 'spending_snapshot')
+
+# Held by the worker fetching from upstream while the others wait for its snapshot
+REFRESH_LOCK_PATH = os.path.join(DATA_DIR, 'refresh.lock')
+
+# Touched after every upstream fetch attempt, successful or not
+LAST_FETCH_PATH = os.path.join(DATA_DIR, 'last_fetch')
+
+# Bump when the on-disk layout changes; older snapshots are then ignored
+SNAPSHOT_FORMAT = 2
+
+_META_FILE = 'meta.json'
+
+
+def dataframe_version(df: pd.DataFrame) -> str:
+    """Short content hash identifying a dataset version."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _to_column_array(series: pd.Series) -> np.ndarray:
+    """Convert a column to a plain NumPy array that needs no pickling."""
+    if series.dtype == object:
+        return series.astype(str).to_numpy(dtype=str)
+    return series.to_numpy()
+
+
+def _column_file(directory: str, i: int) -> str:
+    return os.path.join(directory, f'col_{i}.npy')
+
+
+def _prune_snapshots(path: str, keep) -> None:
+    """Remove superseded snapshot directories of path, except those in keep."""
+    directory, name = os.path.split(path)
+    for entry in os.listdir(directory or '.'):
+        full = os.path.join(directory, entry)
+        if entry.startswith(f'{name}.') and entry.endswith('.snap') and full not in keep:
+            shutil.rmtree(full, ignore_errors=True)
+
+
+def save_snapshot(df: pd.DataFrame, path: str = SNAPSHOT_PATH, extra_meta: Optional[Dict] = None) -> str:
+    """
+    Write df as a columnar snapshot: a directory with one .npy file per
+    column, which load_snapshot memory-maps. path is a symlink switched to
+    the new directory once it is complete, so readers in other workers
+    never see a partial snapshot. The previous directory is kept for
+    readers still opening it; older ones are removed. extra_meta is stored
+    alongside and restored into df.attrs by load_snapshot.
+    """
+    version = dataframe_version(df)
+    meta = {
+        **(extra_meta or {}),
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'columns': list(df.columns),
+    }
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    target = tempfile.mkdtemp(dir=directory, prefix=f'{os.path.basename(path)}.', suffix='.snap')
+    link = f'{target}.link'
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    try:
+        for i, col in enumerate(df.columns):
+            np.save(_column_file(target, i), _to_column_array(df[col]), allow_pickle=False)
+        with open(os.path.join(target, _META_FILE), 'w') as f:
+            json.dump(meta, f)
+        os.symlink(os.path.basename(target), link)
+        os.replace(link, path)
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        if os.path.lexists(link):
+            os.remove(link)
+        raise
+    _prune_snapshots(path, keep={target, previous})
+    return version
+
+
+@contextmanager
+def refresh_lock(path: str = REFRESH_LOCK_PATH) -> Iterator[None]:
+    """Exclusive lock shared by every worker on the host (blocks until free)."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def touch(path: str) -> None:
+    """Create path or update its modification time."""
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a'):
+            os.utime(path)
+    except OSError as e:
+        print(f"Error touching {path}: {e}")
+
+
+def snapshot_age(path: str = SNAPSHOT_PATH) -> Optional[float]:
+    """Seconds since the snapshot was written, or None if there is none."""
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def read_snapshot_meta(path: str = SNAPSHOT_PATH) -> Optional[Dict]:
+    """Read only the snapshot metadata."""
+    try:
+        with open(os.path.join(path, _META_FILE)) as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    Load the last snapshot, or None if missing, unreadable, in an old
+    format, or older than max_age seconds. Numeric columns are read-only
+    memory maps of the snapshot files, shared through the page cache by
+    every worker; string columns are converted to object arrays.
+    """
+    age = snapshot_age(path)
+    if age is None or (max_age is not None and age > max_age):
+        return None
+
+    try:
+        # Resolved once, so a snapshot saved meanwhile can't mix in its files
+        target = os.path.realpath(path)
+        meta = read_snapshot_meta(target)
+        if meta is None or meta.get('format') != SNAPSHOT_FORMAT:
+            return None
+        columns = {col: np.load(_column_file(target, i), mmap_mode='r', allow_pickle=False)
+                   for i, col in enumerate(meta['columns'])}
+    except Exception as e:
+        print(f"Error loading snapshot {path}: {e}")
+        return None
+
+    df = pd.DataFrame(columns, copy=False)
+    for col, values in columns.items():
+        if values.dtype.kind == 'U':
+            df[col] = df[col].astype(object)
+    df.attrs.update({k: v for k, v in meta.items() if k not in ('format', 'columns')})
+    return df
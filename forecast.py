@@ -0,0 +1,184 @@
+"""
+Spending Forecasts
+Damped-trend exponential smoothing fitted to every series at once with NumPy, refitted
+incrementally as months arrive, with forecasts and prediction intervals cached per data version.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import shift_month
+from metrics import record_cache, timed_stage
+
+# Longest horizon served (months); shorter horizons are slices of it
+MAX_HORIZON = 12
+
+# process_data columns forecast by default
+FORECAST_SERIES = ('food_per_household_month', 'food_per_hh_12m_avg', 'food_aud_m_sa')
+DEFAULT_SERIES = 'food_per_household_month'
+
+# Prediction interval coverage (%) -> standard normal quantile
+INTERVALS = {80: 1.2816, 95: 1.9600}
+
+# Smoothing parameter grid: level (alpha), trend (beta) and trend damping (phi).
+# Every series is fitted over every combination in one pass over the months.
+_ALPHA, _BETA, _PHI = (a.ravel() for a in np.meshgrid(
+    np.linspace(0.1, 0.9, 9), (0.01, 0.05, 0.1, 0.2, 0.3), (0.8, 0.9, 0.98, 1.0), indexing='ij'))
+
+
+@dataclass
+class SmoothingState:
+    """
+    Filter state for n_series x n_grid models after the observed months.
+    values keeps the observations fitted so far, to detect appended months.
+    """
+    values: np.ndarray
+    level: np.ndarray
+    trend: np.ndarray
+    sse: np.ndarray
+    count: np.ndarray
+    started: np.ndarray
+
+
+def _initial_state(n_series: int) -> SmoothingState:
+    shape = (n_series, len(_ALPHA))
+    return SmoothingState(values=np.empty((n_series, 0)), level=np.zeros(shape), trend=np.zeros(shape),
+                          sse=np.zeros(shape), count=np.zeros(shape), started=np.zeros((n_series, 1), dtype=bool))
+
+
+def _filter(state: SmoothingState, values: np.ndarray) -> SmoothingState:
+    """Run the smoothing recursion over new columns of values (error-correction form)."""
+    level, trend, sse, count = state.level.copy(), state.trend.copy(), state.sse.copy(), state.count.copy()
+    started = state.started.copy()
+    for y in values.T:
+        y = y[:, None]
+        observed = ~np.isnan(y)
+        prediction = level + _PHI * trend
+        error = np.where(observed & started, y - prediction, 0.0)
+        sse += error ** 2
+        count += observed & started
+        level = np.where(started, prediction + _ALPHA * error, np.where(observed, y, level))
+        trend = np.where(started, _PHI * trend + _ALPHA * _BETA * error, trend)
+        started |= observed
+    return SmoothingState(np.hstack([state.values, values]), level, trend, sse, count, started)
+
+
+def fit(values: np.ndarray, previous: Optional[SmoothingState] = None) -> SmoothingState:
+    """
+    Fit every row of values (n_series x n_months; NaN = missing) over the
+    parameter grid. When previous was fitted to the leading months of the
+    same rows, only the new months are filtered; a revision refits all.
+    """
+    if previous is not None and previous.values.shape[0] == values.shape[0]:
+        n = previous.values.shape[1]
+        if n <= values.shape[1] and np.array_equal(previous.values, values[:, :n], equal_nan=True):
+            return _filter(previous, values[:, n:])
+    return _filter(_initial_state(values.shape[0]), values)
+
+
+@dataclass(frozen=True)
+class Forecasts:
+    """Forecasts up to MAX_HORIZON months for a set of named series. Read-only."""
+    version: str
+    names: List[str]
+    last_month: str
+    point: np.ndarray
+    bounds: Dict[Tuple[str, int], np.ndarray]
+    params: np.ndarray
+    sigma: np.ndarray
+
+    def series(self, name: str, horizon: int = MAX_HORIZON) -> Optional[Dict]:
+        """One series' forecast for the next `horizon` months; None if unknown."""
+        if name not in self.names:
+            return None
+        i = self.names.index(name)
+        alpha, beta, phi = self.params[i]
+        result = {
+            'series': name,
+            'horizon': horizon,
+            'history_end': self.last_month,
+            'labels': [shift_month(self.last_month, h) for h in range(1, horizon + 1)],
+            'forecast': _rounded(self.point[i, :horizon]),
+            'model': {'method': 'damped trend exponential smoothing', 'alpha': round(float(alpha), 2),
+                      'beta': round(float(beta), 2), 'phi': round(float(phi), 2),
+                      'sigma': None if np.isnan(self.sigma[i]) else round(float(self.sigma[i]), 4)},
+        }
+        for (side, coverage), values in sorted(self.bounds.items()):
+            result[f'{side}_{coverage}'] = _rounded(values[i, :horizon])
+        return result
+
+
+def _rounded(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else v for v in values.round(2).tolist()]
+
+
+def forecast(state: SmoothingState, names: List[str], last_month: str, version: str,
+             horizon: int = MAX_HORIZON) -> Forecasts:
+    """Forecasts from each series' best-fitting parameters (lowest one-step squared error)."""
+    rows = np.arange(len(names))
+    best = np.argmin(state.sse, axis=1)
+    alpha, beta, phi = _ALPHA[best], _BETA[best], _PHI[best]
+    level, trend = state.level[rows, best], state.trend[rows, best]
+    count = state.count[rows, best]
+    # Three fitted parameters; series too short to estimate an error get no interval
+    sigma = np.sqrt(np.divide(state.sse[rows, best], count - 3, out=np.full(len(names), np.nan), where=count > 3))
+    fitted = state.started[:, 0] & (count > 0)
+
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi[:, None] ** steps, axis=1)
+    point = np.where(fitted[:, None], level[:, None] + damping * trend[:, None], np.nan)
+    # h-step variance: sigma^2 (1 + sum_{j<h} c_j^2) with c_j = alpha (1 + beta sum_{i<=j} phi^i)
+    c = alpha[:, None] * (1 + beta[:, None] * damping[:, :-1])
+    spread = sigma[:, None] * np.sqrt(1 + np.hstack([np.zeros((len(names), 1)), np.cumsum(c ** 2, axis=1)]))
+
+    bounds = {}
+    for coverage, z in INTERVALS.items():
+        bounds[('lower', coverage)] = point - z * spread
+        bounds[('upper', coverage)] = point + z * spread
+    return Forecasts(version, list(names), last_month, point, bounds,
+                     np.column_stack([alpha, beta, phi]), sigma)
+
+
+# Last fit per source ('mhsi', 'cube'), continued when months are appended
+_states: Dict[str, SmoothingState] = {}
+_forecasts: Dict[str, Forecasts] = {}
+_lock = threading.Lock()
+
+
+@timed_stage('forecast')
+def _refit(source: str, version: str, names: List[str], months: List[str], values: np.ndarray) -> Forecasts:
+    state = fit(values, _states.get(source))
+    _states[source] = state
+    return forecast(state, names, months[-1], version)
+
+
+def _forecasts_for(source: str, version: str, names: List[str], months: List[str],
+                   values: np.ndarray) -> Forecasts:
+    """Cached Forecasts for a source's (n_series x n_months) values at a data version."""
+    cached = _forecasts.get(source)
+    record_cache('forecasts', cached is not None and cached.version == version)
+    if cached is not None and cached.version == version:
+        return cached
+    with _lock:
+        cached = _forecasts.get(source)
+        if cached is None or cached.version != version:
+            cached = _forecasts[source] = _refit(source, version, names, months, values)
+    return cached
+
+
+def mhsi_forecasts(df: pd.DataFrame) -> Forecasts:
+    """Forecasts of the FORECAST_SERIES columns of a process_data result."""
+    values = np.vstack([df[name].to_numpy(dtype=float) for name in FORECAST_SERIES])
+    return _forecasts_for('mhsi', df.attrs.get('version', ''), list(FORECAST_SERIES),
+                          df['month'].tolist(), values)
+
+
+def cube_forecasts(store) -> Forecasts:
+    """Forecasts of every MHSI cube series, named REGION.CATEGORY."""
+    names = [f'{r}.{c}' for r in store.regions for c in store.categories]
+    values = store.values.reshape(len(names), -1)
+    return _forecasts_for('cube', store.version, names, store.months.tolist(), values)
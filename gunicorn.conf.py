@@ -0,0 +1,17 @@
+"""
+Gunicorn Settings
+Loaded automatically from the working directory. Keeps the per-worker metrics files
+in METRICS_DIR to the workers of the running server.
+"""
+
+from metrics import registry
+
+
+def on_starting(server):
+    """Drop files left by a previous server (PIDs repeat across container restarts)."""
+    registry.clear()
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's file so /metrics stops counting it."""
+    registry.remove(worker.pid)
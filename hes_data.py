@@ -3,12 +3,48 @@ ABS Household Expenditure Survey Data Module - ABSOLUTE FINAL
 All fields from distribution.html template included.
 """
 
+import copy
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
 
+from cpi_index import CPIIndex
+from metrics import record_cache
+
+# Defaults until CPI data is ingested (see CPIReference)
 CPI_ADJUSTMENT_FACTOR = 1.31
 CPI_ADJUSTMENT_FACTOR_FOOD = 1.36
+CPI_TARGET_PERIOD = 'February 2026'
+CPI_TARGET_MONTH = '2026-02'
+
+
+@dataclass(frozen=True)
+class CPIReference:
+    """
+    CPI factors relative to 2015-16 and the period they adjust to.
+    Ingestion swaps in a new reference as one object, so readers never
+    mix old and new values.
+    """
+    factor: float
+    food_factor: float
+    target_period: str
+    target_month: str
+    # Monthly CPI index for ?as_of= rebasing; derived from the factors if None
+    index: Optional[CPIIndex] = None
+
 
+_cpi_reference = CPIReference(CPI_ADJUSTMENT_FACTOR, CPI_ADJUSTMENT_FACTOR_FOOD,
+                              CPI_TARGET_PERIOD, CPI_TARGET_MONTH)
+
+# As-of month snapshots kept per process
+MAX_MONTH_SNAPSHOTS = 240
+
+# Annual household income per quintile, in CPI_TARGET_PERIOD dollars
 QUINTILE_ANNUAL_INCOME_2025 = {
     'Quintile 1 (Lowest)': 38000,
     'Quintile 2': 65000,
@@ -72,8 +108,14 @@ SPENDING_INCOME_QUINTILE_2016 = {
     }
 }
 
+# Dimensions available to the cross-tabulation engine
+CROSS_TAB_DIMENSIONS = ('household_type', 'income_quintile', 'age_group')
+CROSS_TAB_DEFAULT_DIMENSIONS = ('household_type', 'income_quintile')
+
 def adjust_to_2025_dollars(value_2016: float, use_food_cpi: bool = False) -> float:
-    return value_2016 * (CPI_ADJUSTMENT_FACTOR_FOOD if use_food_cpi else CPI_ADJUSTMENT_FACTOR)
+    """2015-16 value in the current CPI target period's dollars."""
+    reference = _cpi_reference
+    return value_2016 * (reference.food_factor if use_food_cpi else reference.factor)
 
 def weekly_to_monthly(weekly_value: float) -> float:
     return weekly_value * 4.33
@@ -81,7 +123,7 @@ def weekly_to_monthly(weekly_value: float) -> float:
 def weekly_to_daily(weekly_value: float) -> float:
     return weekly_value / 7
 
-def get_income_quintile_data() -> pd.DataFrame:
+def _build_income_quintile_data() -> pd.DataFrame:
     data = []
     for quintile, values in SPENDING_INCOME_QUINTILE_2016.items():
         weekly_2016 = values['weekly_2016']
@@ -103,13 +145,14 @@ def get_income_quintile_data() -> pd.DataFrame:
             'avg_persons': avg_persons,
             'avg_household_size': avg_persons,
             'per_person_monthly_2025': monthly_2025 / avg_persons,
+            'annual_income': annual_income,
             'proportion_income': proportion_income,
             'source': values.get('source', '')
         })
     
     return pd.DataFrame(data)
 
-def get_household_type_data() -> pd.DataFrame:
+def _build_household_type_data() -> pd.DataFrame:
     data = []
     for household_type, values in SPENDING_HOUSEHOLD_TYPE_2016.items():
         weekly_2016 = values['weekly_2016']
@@ -130,8 +173,7 @@ def get_household_type_data() -> pd.DataFrame:
     
     return pd.DataFrame(data)
 
-def get_ndis_segment_data() -> pd.DataFrame:
-    quintile_df = get_income_quintile_data()
+def _build_ndis_segment_data(quintile_df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame([
         {
             'segment': 'DSP only (single)',
@@ -147,17 +189,14 @@ def get_ndis_segment_data() -> pd.DataFrame:
         }
     ])
 
-def get_distribution_summary() -> Dict[str, Any]:
+def _build_distribution_summary(quintile_df: pd.DataFrame, household_df: pd.DataFrame,
+                                ndis_df: pd.DataFrame, food_factor: float, period: str) -> Dict[str, Any]:
     """Get summary with ALL required fields including ndis_range."""
-    quintile_df = get_income_quintile_data()
-    household_df = get_household_type_data()
-    ndis_df = get_ndis_segment_data()
-    
     lowest = float(quintile_df.iloc[0]['monthly_2025'])
     highest = float(quintile_df.iloc[-1]['monthly_2025'])
     
     return {
-        'cpi_adjustment': '36% food-specific CPI (2015-16 to February 2026)',
+        'cpi_adjustment': f'{round((food_factor - 1) * 100)}% food-specific CPI (2015-16 to {period})',
         'quintile_range': {
             'lowest': lowest,
             'highest': highest,
@@ -173,8 +212,7 @@ def get_distribution_summary() -> Dict[str, Any]:
         }
     }
 
-def get_chart_data_quintiles() -> Dict[str, List]:
-    df = get_income_quintile_data()
+def _build_chart_data_quintiles(df: pd.DataFrame) -> Dict[str, List]:
     return {
         'labels': df['quintile'].tolist(),
         'monthly_2025': df['monthly_2025'].round(0).tolist(),
@@ -182,23 +220,20 @@ def get_chart_data_quintiles() -> Dict[str, List]:
         'proportion_income': df['proportion_income'].round(1).tolist()
     }
 
-def get_chart_data_household() -> Dict[str, List]:
-    df = get_household_type_data()
+def _build_chart_data_household(df: pd.DataFrame) -> Dict[str, List]:
     return {
         'labels': df['household_type'].tolist(),
         'monthly_2025': df['monthly_2025'].round(0).tolist(),
         'per_person_2025': df['per_person_monthly_2025'].round(0).tolist()
     }
 
-def get_chart_data_ndis() -> Dict[str, List]:
-    df = get_ndis_segment_data()
+def _build_chart_data_ndis(df: pd.DataFrame) -> Dict[str, List]:
     return {
         'labels': df['segment'].tolist(),
         'monthly_2025': df['monthly_2025'].tolist()
     }
 
-def get_per_person_summary() -> Dict[str, Any]:
-    household_df = get_household_type_data()
+def _build_per_person_summary(household_df: pd.DataFrame) -> Dict[str, Any]:
     
     single = household_df[household_df['household_type'] == 'One person'].iloc[0]
     couple = household_df[household_df['household_type'] == 'Couple only'].iloc[0]
@@ -222,10 +257,8 @@ def get_per_person_summary() -> Dict[str, Any]:
         }
     }
 
-def get_per_person_chart_data() -> Dict[str, Any]:
+def _build_per_person_chart_data(quintile_df: pd.DataFrame, household_df: pd.DataFrame) -> Dict[str, Any]:
     """Get per-person comparison chart data with both quintile and household comparisons."""
-    quintile_df = get_income_quintile_data()
-    household_df = get_household_type_data()
     
     return {
         'quintile_comparison': {
@@ -240,41 +273,44 @@ def get_per_person_chart_data() -> Dict[str, Any]:
         }
     }
 
-def get_cross_tabulation_matrix() -> pd.DataFrame:
-    """Generate cross-tabulation matrix in WIDE format for template."""
-    household_df = get_household_type_data()
-    quintile_df = get_income_quintile_data()
-    
-    middle_quintile_per_person = quintile_df.iloc[2]['per_person_monthly_2025']
-    
-    # Build data in long format first
-    data = []
-    for _, h_row in household_df.iterrows():
-        base_per_person = h_row['per_person_monthly_2025']
-        
-        for _, q_row in quintile_df.iterrows():
-            factor = q_row['per_person_monthly_2025'] / middle_quintile_per_person
-            adjusted_value = base_per_person * factor
-            
-            data.append({
-                'household_type': h_row['household_type'],
-                'income_quintile': q_row['quintile'],
-                'per_person_monthly_2025': round(adjusted_value, 0)
-            })
-    
-    # Convert to wide format
-    df_long = pd.DataFrame(data)
-    df_wide = df_long.pivot(
-        index='household_type',
-        columns='income_quintile',
-        values='per_person_monthly_2025'
-    )
-    
-    # Reset index and rename columns to match template
-    df_wide = df_wide.reset_index()
-    df_wide = df_wide.rename(columns={'household_type': 'Household Type'})
+def _build_cross_tab_factors(quintile_df: pd.DataFrame, household_df: pd.DataFrame,
+                             lone_person_df: pd.DataFrame) -> Dict[str, Tuple[List[str], np.ndarray]]:
+    """
+    Per-dimension (labels, factors) for the cross-tabulation engine.
+    Factors are relative to CROSS_TAB_REFERENCE (middle quintile per-person
+    spending), so a cell is the reference times the factor of each of its levels.
+    """
+    reference = quintile_df.iloc[2]['per_person_monthly_2025']
+    lone_monthly = lone_person_df['monthly_2025'].to_numpy()
+    return {
+        'household_type': (
+            household_df['household_type'].tolist(),
+            household_df['per_person_monthly_2025'].to_numpy() / reference
+        ),
+        'income_quintile': (
+            quintile_df['quintile'].tolist(),
+            quintile_df['per_person_monthly_2025'].to_numpy() / reference
+        ),
+        'age_group': (
+            lone_person_df['age_group'].tolist(),
+            lone_monthly / lone_monthly.mean()
+        ),
+    }
+
+def compute_cross_tab(factors: Dict[str, Tuple[List[str], np.ndarray]], reference: float,
+                      dimensions: Sequence[str]) -> np.ndarray:
+    """Per-person monthly values for every combination of levels, as an outer product."""
+    values = np.asarray(reference, dtype=float)
+    for dim in dimensions:
+        values = np.multiply.outer(values, factors[dim][1])
+    return values.round(0)
+
+def _build_cross_tabulation_matrix(household_df: pd.DataFrame, quintile_df: pd.DataFrame,
+                                   factors: Dict[str, Tuple[List[str], np.ndarray]]) -> pd.DataFrame:
+    """Generate household type x quintile cross-tabulation matrix in WIDE format for template."""
+    reference = quintile_df.iloc[2]['per_person_monthly_2025']
+    grid = compute_cross_tab(factors, reference, ('household_type', 'income_quintile'))
     
-    # Rename quintile columns
     quintile_map = {
         'Quintile 1 (Lowest)': 'Quintile 1',
         'Quintile 2': 'Quintile 2',
@@ -282,15 +318,15 @@ def get_cross_tabulation_matrix() -> pd.DataFrame:
         'Quintile 4': 'Quintile 4',
         'Quintile 5 (Highest)': 'Quintile 5'
     }
-    df_wide = df_wide.rename(columns=quintile_map)
-    
-    # Format values as currency strings
-    for col in ['Quintile 1', 'Quintile 2', 'Quintile 3', 'Quintile 4', 'Quintile 5']:
-        df_wide[col] = df_wide[col].apply(lambda x: f'${int(x)}')
+    df_wide = pd.DataFrame(
+        grid,
+        columns=[quintile_map.get(q, q) for q in factors['income_quintile'][0]]
+    )
+    df_wide.insert(0, 'Household Type', factors['household_type'][0])
     
-    return df_wide
+    return df_wide.sort_values('Household Type').reset_index(drop=True)
 
-def get_lone_person_spending_table_9_1() -> pd.DataFrame:
+def _build_lone_person_spending_table_9_1() -> pd.DataFrame:
     data = []
     for age_group, values in SPENDING_NON_FAMILY_HOUSEHOLDS_2016.items():
         weekly_2016 = values['weekly_2016']
@@ -310,7 +346,7 @@ def get_lone_person_spending_table_9_1() -> pd.DataFrame:
     
     return pd.DataFrame(data)
 
-def get_lone_person_summary() -> Dict[str, Any]:
+def _build_lone_person_summary() -> Dict[str, Any]:
     ages_list = list(SPENDING_NON_FAMILY_HOUSEHOLDS_2016.values())
     simple_avg_weekly_2016 = sum(a['weekly_2016'] for a in ages_list) / len(ages_list)
     simple_avg_weekly_2025 = adjust_to_2025_dollars(simple_avg_weekly_2016, use_food_cpi=True)
@@ -355,9 +391,7 @@ def get_lone_person_summary() -> Dict[str, Any]:
         }
     }
 
-def get_methodology_comparison() -> Dict[str, Any]:
-    summary = get_lone_person_summary()
-    household_df = get_household_type_data()
+def _build_methodology_comparison(summary: Dict[str, Any], household_df: pd.DataFrame) -> Dict[str, Any]:
     
     one_person_value = household_df[household_df['household_type'] == 'One person'].iloc[0]['monthly_2025']
     
@@ -380,6 +414,382 @@ def get_methodology_comparison() -> Dict[str, Any]:
         }
     }
 
+@dataclass(frozen=True)
+class HESSnapshot:
+    """
+    Every HES table and summary, derived once from the SPENDING_*_2016
+    tables and CPI factors. Amounts (the *_2025 fields, named for the
+    original target year) are in price_period dollars, cpi_food_factor
+    times their 2015-16 value.
+    Shared by all callers: treat as read-only.
+    """
+    version: str
+    quintile_data: pd.DataFrame
+    household_data: pd.DataFrame
+    ndis_data: pd.DataFrame
+    lone_person_data: pd.DataFrame
+    cross_tab_matrix: pd.DataFrame
+    cross_tab_factors: Dict[str, Tuple[List[str], np.ndarray]]
+    cross_tab_reference: float
+    distribution_summary: Dict[str, Any]
+    per_person_summary: Dict[str, Any]
+    lone_person_summary: Dict[str, Any]
+    methodology_comparison: Dict[str, Any]
+    chart_data_quintiles: Dict[str, List]
+    chart_data_household: Dict[str, List]
+    chart_data_ndis: Dict[str, List]
+    per_person_chart_data: Dict[str, Any]
+    records: Dict[str, List[Dict[str, Any]]]
+    cpi_food_factor: float
+    price_period: str
+    as_of: Optional[str] = None
+
+
+def get_hes_parameters_version() -> str:
+    """Hash of every input the HES tables are derived from."""
+    reference = _cpi_reference
+    params = {
+        'cpi': reference.factor,
+        'cpi_food': reference.food_factor,
+        'cpi_target_period': reference.target_period,
+        'cpi_target_month': reference.target_month,
+        'cpi_index': reference.index.version if reference.index is not None else None,
+        'income': QUINTILE_ANNUAL_INCOME_2025,
+        'household_type': SPENDING_HOUSEHOLD_TYPE_2016,
+        'non_family': SPENDING_NON_FAMILY_HOUSEHOLDS_2016,
+        'non_family_weighted': SPENDING_NON_FAMILY_WEIGHTED_AVERAGE,
+        'income_quintile': SPENDING_INCOME_QUINTILE_2016,
+    }
+    encoded = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def _assemble_snapshot(version: str, as_of: Optional[str], cpi_food_factor: float, price_period: str,
+                       quintile_df: pd.DataFrame, household_df: pd.DataFrame, lone_person_df: pd.DataFrame,
+                       cross_tab_factors: Dict[str, Tuple[List[str], np.ndarray]],
+                       lone_person_summary: Dict[str, Any]) -> HESSnapshot:
+    """Snapshot from its core tables; the remaining tables and summaries are derived from them."""
+    ndis_df = _build_ndis_segment_data(quintile_df)
+    cross_tab_df = _build_cross_tabulation_matrix(household_df, quintile_df, cross_tab_factors)
+    
+    return HESSnapshot(
+        version=version,
+        quintile_data=quintile_df,
+        household_data=household_df,
+        ndis_data=ndis_df,
+        lone_person_data=lone_person_df,
+        cross_tab_matrix=cross_tab_df,
+        cross_tab_factors=cross_tab_factors,
+        cross_tab_reference=float(quintile_df.iloc[2]['per_person_monthly_2025']),
+        distribution_summary=_build_distribution_summary(quintile_df, household_df, ndis_df,
+                                                         cpi_food_factor, price_period),
+        per_person_summary=_build_per_person_summary(household_df),
+        lone_person_summary=lone_person_summary,
+        methodology_comparison=_build_methodology_comparison(lone_person_summary, household_df),
+        chart_data_quintiles=_build_chart_data_quintiles(quintile_df),
+        chart_data_household=_build_chart_data_household(household_df),
+        chart_data_ndis=_build_chart_data_ndis(ndis_df),
+        per_person_chart_data=_build_per_person_chart_data(quintile_df, household_df),
+        records={
+            'quintile_data': quintile_df.to_dict('records'),
+            'household_data': household_df.to_dict('records'),
+            'ndis_data': ndis_df.to_dict('records'),
+            'lone_person_data': lone_person_df.to_dict('records'),
+            'cross_tab_matrix': cross_tab_df.to_dict('records'),
+        },
+        cpi_food_factor=cpi_food_factor,
+        price_period=price_period,
+        as_of=as_of
+    )
+
+
+def build_hes_snapshot(version: Optional[str] = None) -> HESSnapshot:
+    """
+    Derive every table and summary once, reusing shared intermediate tables.
+    The version is taken first: a snapshot built while the CPI reference
+    changes is then rebuilt by the next get_hes_snapshot.
+    """
+    version = version or get_hes_parameters_version()
+    reference = _cpi_reference
+    quintile_df = _build_income_quintile_data()
+    household_df = _build_household_type_data()
+    lone_person_df = _build_lone_person_spending_table_9_1()
+    return _assemble_snapshot(
+        version=version,
+        as_of=None,
+        cpi_food_factor=reference.food_factor,
+        price_period=reference.target_period,
+        quintile_df=quintile_df,
+        household_df=household_df,
+        lone_person_df=lone_person_df,
+        cross_tab_factors=_build_cross_tab_factors(quintile_df, household_df, lone_person_df),
+        lone_person_summary=_build_lone_person_summary()
+    )
+
+
+def month_label(month: str) -> str:
+    """YYYY-MM as shown with amounts, e.g. 'February 2026'."""
+    return datetime.strptime(month, '%Y-%m').strftime('%B %Y')
+
+
+def get_cpi_reference() -> CPIReference:
+    return _cpi_reference
+
+
+def set_cpi_reference(reference: CPIReference) -> None:
+    """Use ingested CPI factors (and monthly index) from now on."""
+    global _cpi_reference
+    _cpi_reference = reference
+
+
+def get_cpi_index() -> CPIIndex:
+    """The ingested monthly CPI index, or one interpolated from the current factors."""
+    reference = _cpi_reference
+    if reference.index is not None:
+        return reference.index
+    return _anchor_index(reference.food_factor, reference.factor, reference.target_month)
+
+
+_anchor_indexes: Dict[Tuple[float, float, str], CPIIndex] = {}
+
+def _anchor_index(food: float, general: float, month: str) -> CPIIndex:
+    key = (food, general, month)
+    index = _anchor_indexes.get(key)
+    if index is None:
+        index = _anchor_indexes[key] = CPIIndex.from_anchors(food, general, month)
+    return index
+
+
+_snapshot: Optional[HESSnapshot] = None
+_month_snapshots: Dict[Tuple[str, str], HESSnapshot] = {}
+_snapshot_lock = threading.Lock()
+
+
+# CPI-adjusted amounts rebased for ?as_of=: table columns and lone person summary keys
+ADJUSTED_COLUMNS = ('weekly_2025', 'monthly_2025', 'daily_2025',
+                    'per_person_monthly_2025', 'annual_income')
+ADJUSTED_SUMMARY_KEYS = ('weekly_2025', 'monthly_2025', 'daily_2025', 'value_monthly', 'value_daily')
+
+
+def _rebase_table(df: pd.DataFrame, rebase: Callable[[np.ndarray], np.ndarray]) -> pd.DataFrame:
+    return df.assign(**{col: rebase(df[col].to_numpy()) for col in ADJUSTED_COLUMNS if col in df.columns})
+
+
+def _rebase_summary(summary: Dict[str, Any], rebase: Callable[[np.ndarray], np.ndarray]) -> Dict[str, Any]:
+    return {
+        key: _rebase_summary(value, rebase) if isinstance(value, dict)
+        else float(rebase(value)) if key in ADJUSTED_SUMMARY_KEYS else value
+        for key, value in summary.items()
+    }
+
+
+def _build_month_snapshot(base: HESSnapshot, as_of: str) -> HESSnapshot:
+    """
+    The base snapshot with every amount rebased to the as_of month: each is
+    taken back to 2015-16 dollars and rebased with the monthly CPI index.
+    Incomes move with spending, so ratios (cross-tab factors, proportion of
+    income) carry over unchanged.
+    """
+    index = get_cpi_index()
+    food, _ = index.factors(as_of)
+    
+    def rebase(values):
+        return index.rebase(np.asarray(values, dtype=float) / base.cpi_food_factor, as_of)
+    
+    return _assemble_snapshot(
+        version=f'{base.version}@{as_of}',
+        as_of=as_of,
+        cpi_food_factor=food,
+        price_period=month_label(as_of),
+        quintile_df=_rebase_table(base.quintile_data, rebase),
+        household_df=_rebase_table(base.household_data, rebase),
+        lone_person_df=_rebase_table(base.lone_person_data, rebase),
+        cross_tab_factors=base.cross_tab_factors,
+        lone_person_summary=_rebase_summary(base.lone_person_summary, rebase)
+    )
+
+
+def get_hes_snapshot(as_of: Optional[str] = None) -> HESSnapshot:
+    """
+    Current HES snapshot; rebuilt only when the input parameters change.
+    With as_of (YYYY-MM) values are rebased to that month from the current
+    snapshot. Each month is derived on first use and then served from
+    memory. Raises ValueError for months outside the CPI index.
+    """
+    global _snapshot
+    version = get_hes_parameters_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = build_hes_snapshot(version)
+            snapshot = _snapshot
+    if not as_of:
+        return snapshot
+    
+    key = (snapshot.version, as_of)
+    month_snapshot = _month_snapshots.get(key)
+    record_cache('hes_month_snapshots', month_snapshot is not None)
+    if month_snapshot is None:
+        month_snapshot = _build_month_snapshot(snapshot, as_of)
+        with _snapshot_lock:
+            if len(_month_snapshots) >= MAX_MONTH_SNAPSHOTS:
+                _month_snapshots.clear()
+            month_snapshot = _month_snapshots.setdefault(key, month_snapshot)
+    return month_snapshot
+
+
+# Public accessors return copies so callers can't modify the shared snapshot
+
+def get_income_quintile_data() -> pd.DataFrame:
+    return get_hes_snapshot().quintile_data.copy()
+
+def get_household_type_data() -> pd.DataFrame:
+    return get_hes_snapshot().household_data.copy()
+
+def get_ndis_segment_data() -> pd.DataFrame:
+    return get_hes_snapshot().ndis_data.copy()
+
+def get_distribution_summary() -> Dict[str, Any]:
+    """Get summary with ALL required fields including ndis_range."""
+    return copy.deepcopy(get_hes_snapshot().distribution_summary)
+
+def get_chart_data_quintiles() -> Dict[str, List]:
+    return copy.deepcopy(get_hes_snapshot().chart_data_quintiles)
+
+def get_chart_data_household() -> Dict[str, List]:
+    return copy.deepcopy(get_hes_snapshot().chart_data_household)
+
+def get_chart_data_ndis() -> Dict[str, List]:
+    return copy.deepcopy(get_hes_snapshot().chart_data_ndis)
+
+def get_per_person_summary() -> Dict[str, Any]:
+    return copy.deepcopy(get_hes_snapshot().per_person_summary)
+
+def get_per_person_chart_data() -> Dict[str, Any]:
+    """Get per-person comparison chart data with both quintile and household comparisons."""
+    return copy.deepcopy(get_hes_snapshot().per_person_chart_data)
+
+def get_cross_tabulation_matrix() -> pd.DataFrame:
+    """Generate cross-tabulation matrix in WIDE format for template."""
+    return get_hes_snapshot().cross_tab_matrix.copy()
+
+def get_cross_tab(dimensions: Sequence[str] = CROSS_TAB_DEFAULT_DIMENSIONS,
+                  as_of: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Per-person monthly spending (CPI_TARGET_PERIOD or as_of month dollars) for
+    every combination of the given dimensions, as a nested list with one
+    axis per dimension. Raises ValueError for unknown or repeated
+    dimensions or an unavailable month.
+    """
+    dimensions = tuple(dimensions)
+    unknown = [d for d in dimensions if d not in CROSS_TAB_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}")
+    if not dimensions or len(set(dimensions)) != len(dimensions):
+        raise ValueError("Dimensions must be a non-empty list without repeats")
+    
+    snapshot = get_hes_snapshot(as_of)
+    values = compute_cross_tab(snapshot.cross_tab_factors, snapshot.cross_tab_reference, dimensions)
+    return {
+        'dimensions': list(dimensions),
+        'labels': {d: list(snapshot.cross_tab_factors[d][0]) for d in dimensions},
+        'values': values.tolist(),
+        'units': f"AUD per person per month ({snapshot.price_period} dollars)"
+    }
+
+def get_lone_person_spending_table_9_1() -> pd.DataFrame:
+    return get_hes_snapshot().lone_person_data.copy()
+
+def get_lone_person_summary() -> Dict[str, Any]:
+    return copy.deepcopy(get_hes_snapshot().lone_person_summary)
+
+def get_methodology_comparison() -> Dict[str, Any]:
+    return copy.deepcopy(get_hes_snapshot().methodology_comparison)
+
+# Batch household estimates
+
+ESTIMATE_INPUT_COLUMNS = ('household_type', 'household_size', 'income_quintile', 'age_group')
+ESTIMATE_OUTPUT_COLUMNS = ('per_person_monthly_2025', 'monthly_2025', 'weekly_2025', 'daily_2025', 'error')
+
+def _level_lookup(labels: List[str], aliases: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Case-insensitive label -> level index map, plus any extra aliases."""
+    lookup = {label.lower(): i for i, label in enumerate(labels)}
+    lookup.update(aliases or {})
+    return lookup
+
+def _map_levels(values: pd.Series, lookup: Dict[str, int]) -> np.ndarray:
+    """Level index per row; -1 for missing values, -2 for unknown ones."""
+    keys = values.astype(str).str.strip().str.lower()
+    missing = values.isna().to_numpy() | (keys == '').to_numpy() | (keys == 'nan').to_numpy()
+    codes = keys.map(lookup).to_numpy(dtype=float, na_value=np.nan)
+    codes = np.where(np.isnan(codes), -2, codes).astype(int)
+    codes[missing] = -1
+    return codes
+
+def estimate_households(profiles: pd.DataFrame, as_of: Optional[str] = None) -> pd.DataFrame:
+    """
+    Estimate grocery spending for many household profiles in one pass.
+
+    Each row needs household_type; household_size (default: the type's
+    average size), income_quintile (label, 'Quintile N' or N; default:
+    middle quintile) and age_group (default: all ages) are optional.
+    The per-person value is the cross-tabulation cell for the row's levels,
+    scaled to the household size. Invalid rows get NaN estimates and a
+    message in 'error'. Amounts are in CPI_TARGET_PERIOD dollars, or those
+    of the as_of month (YYYY-MM).
+    """
+    snapshot = get_hes_snapshot(as_of)
+    factors = snapshot.cross_tab_factors
+    n = len(profiles)
+    
+    def column(name):
+        return profiles[name] if name in profiles.columns else pd.Series([None] * n, index=profiles.index)
+    
+    household_labels, household_factors = factors['household_type']
+    quintile_labels, quintile_factors = factors['income_quintile']
+    age_labels, age_factors = factors['age_group']
+    
+    quintile_aliases = {}
+    for i in range(len(quintile_labels)):
+        quintile_aliases.update({f'quintile {i + 1}': i, f'q{i + 1}': i, str(i + 1): i, f'{i + 1}.0': i})
+    
+    household = _map_levels(column('household_type'), _level_lookup(household_labels))
+    quintile = _map_levels(column('income_quintile'), _level_lookup(quintile_labels, quintile_aliases))
+    age = _map_levels(column('age_group'), _level_lookup(age_labels))
+    size = pd.to_numeric(column('household_size'), errors='coerce').to_numpy(dtype=float)
+    
+    error = np.full(n, '', dtype=object)
+    error[age == -2] = 'unknown age_group'
+    error[quintile == -2] = 'unknown income_quintile'
+    error[size <= 0] = 'household_size must be positive'
+    error[household == -2] = 'unknown household_type'
+    error[household == -1] = 'household_type is required'
+    valid = error == ''
+    
+    # Missing optional levels use neutral factors (middle quintile, all ages)
+    household_factor = np.append(household_factors, np.nan)[np.where(household >= 0, household, -1)]
+    quintile_factor = np.where(quintile >= 0, quintile_factors[np.clip(quintile, 0, None)], 1.0)
+    age_factor = np.where(age >= 0, age_factors[np.clip(age, 0, None)], 1.0)
+    
+    avg_persons = snapshot.household_data['avg_persons'].to_numpy()
+    default_size = np.append(avg_persons, np.nan)[np.where(household >= 0, household, -1)]
+    size = np.where(np.isnan(size), default_size, size)
+    
+    per_person = snapshot.cross_tab_reference * household_factor * quintile_factor * age_factor
+    per_person = np.where(valid, per_person, np.nan)
+    monthly = per_person * size
+    weekly = monthly / weekly_to_monthly(1.0)
+    
+    result = profiles.copy()
+    result['household_size'] = size
+    result['per_person_monthly_2025'] = per_person.round(2)
+    result['monthly_2025'] = monthly.round(2)
+    result['weekly_2025'] = weekly.round(2)
+    result['daily_2025'] = weekly_to_daily(weekly).round(2)
+    result['error'] = error
+    return result
+
 if __name__ == '__main__':
     print("=== ABSOLUTE FINAL VERSION ===\n")
     
@@ -0,0 +1,153 @@
+"""
+HTTP Caching and Compression
+Data-version ETags, Cache-Control headers and response compression for Flask routes.
+"""
+
+import gzip
+import hashlib
+import threading
+from functools import wraps
+from typing import Callable, Dict, Sequence, Tuple
+
+from flask import Flask, current_app, make_response, request
+
+from metrics import record_cache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 500
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'application/javascript',
+    'text/javascript',
+}
+
+
+def make_etag(version: str, path: str) -> str:
+    """ETag value for a data version and request path (including query string)."""
+    return hashlib.sha1(f"{version}|{path}".encode()).hexdigest()[:20]
+
+
+def cached_api(version_func: Callable[[], str], max_age: int = 60):
+    """
+    Tag a view's response with an ETag derived from version_func().
+    A request whose If-None-Match matches gets a 304 without the view running.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = make_etag(version_func(), request.full_path)
+            not_modified = request.if_none_match.contains_weak(etag)
+            record_cache('http_etag', not_modified)
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Weak, because compressed and identity encodings share the tag
+            response.set_etag(etag, weak=True)
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            return response
+        return wrapper
+    return decorator
+
+
+# endpoint and query values -> (version, {encoding: body}); '' is the identity body
+_pages: Dict[Tuple, Tuple[str, Dict[str, bytes]]] = {}
+_pages_lock = threading.Lock()
+
+# Rendered pages kept per process (distinct endpoint/query combinations)
+MAX_CACHED_PAGES = 256
+
+
+def cached_page(version_func: Callable[[], str], params: Sequence[str] = ()):
+    """
+    Cache a page's rendered HTML per endpoint, version_func() and the given
+    query parameters, with gzip/brotli bodies compressed once. A new version
+    replaces the entry, so a data refresh or parameter change re-renders it.
+    Only 200 responses are cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint,) + tuple(request.args.get(p) for p in params)
+            version = version_func()
+            etag = make_etag(version, '|'.join(str(k) for k in key))
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                cached = _pages.get(key)
+                record_cache('pages', cached is not None and cached[0] == version)
+                if cached is None or cached[0] != version:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    html = response.get_data()
+                    bodies = {'': html, 'gzip': compress_body(html, 'gzip')}
+                    if brotli is not None:
+                        bodies['br'] = compress_body(html, 'br')
+                    cached = (version, bodies)
+                    with _pages_lock:
+                        if key not in _pages and len(_pages) >= MAX_CACHED_PAGES:
+                            _pages.clear()
+                        _pages[key] = cached
+
+                encoding = choose_encoding(request.accept_encodings)
+                response = current_app.response_class(cached[1][encoding], mimetype='text/html')
+                if encoding:
+                    response.headers['Content-Encoding'] = encoding
+            response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    """Compress a response body with 'br' or 'gzip'."""
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best encoding the client accepts: 'br', 'gzip' or '' for none."""
+    if brotli is not None and 'br' in accept_encodings:
+        return 'br'
+    if 'gzip' in accept_encodings:
+        return 'gzip'
+    return ''
+
+
+def init_compression(app: Flask) -> None:
+    """Compress eligible responses with brotli or gzip when the client accepts it."""
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        data = response.get_data()
+        if not encoding or len(data) < MIN_COMPRESS_SIZE:
+            return response
+
+        response.set_data(compress_body(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
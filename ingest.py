@@ -0,0 +1,216 @@
+"""
+Concurrent Source Ingestion
+Refreshes MHSI, food/all-groups CPI and household counts from the ABS API in parallel,
+caching each source separately, and applies the results to the reference constants.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+import data_fetcher
+import hes_data
+from cpi_index import cpi_index_from_sources, quarter_to_month
+from data_fetcher import ABS_API_BASE, decode_sdmx_observations, fetch_abs_data, fetch_incremental
+from data_store import DATA_DIR, load_snapshot, save_snapshot
+from series_store import fetch_cube, install_cube
+
+# Quarterly CPI index numbers, weighted average of eight capital cities, original series
+CPI_DATAFLOW_URL = f"{ABS_API_BASE}/ABS,CPI,2.0.0"
+CPI_FOOD_KEY = "1.20001.10.50.Q"        # Food and non-alcoholic beverages
+CPI_ALL_GROUPS_KEY = "1.10001.10.50.Q"  # All groups CPI
+
+# Quarters of the HES 2015-16 reference year, averaged as the CPI base
+CPI_BASE_PERIODS = ('2015-Q3', '2015-Q4', '2016-Q1', '2016-Q2')
+
+# Household projections (Australia total, one observation per year, in thousands)
+HOUSEHOLDS_URL = os.environ.get(
+    'HOUSEHOLDS_URL',
+    f"{ABS_API_BASE}/ABS,HH_PROJ,1.0.0/all?dimensionAtObservation=AllDimensions"
+)
+HOUSEHOLDS_UNIT = 1000
+# The Australia-total series: the dataflow also holds each state and territory
+HOUSEHOLDS_SERIES = (('REGION', 'AUS'),)
+# Plausible Australian household counts (guards against a state or wrong unit)
+HOUSEHOLDS_RANGE = (5_000_000, 20_000_000)
+
+# Seconds before a cached CPI/household source is fetched again
+SOURCE_MAX_AGE = 24 * 60 * 60
+
+# Per-source request timeouts (seconds)
+SOURCE_TIMEOUTS = {
+    'mhsi': 30,
+    'cube': 60,
+    'cpi_food': 20,
+    'cpi_all_groups': 20,
+    'households': 20,
+}
+
+
+@dataclass(frozen=True)
+class Source:
+    """
+    A cached single-series ABS source. series pins (dimension, code) pairs
+    that must be present; other dimensions are narrowed to their first code.
+    """
+    name: str
+    url: str
+    path: str
+    series: Tuple[Tuple[str, str], ...] = ()
+
+
+def _cpi_url(key: str) -> str:
+    return f"{CPI_DATAFLOW_URL}/{key}?startPeriod=2015-Q1&dimensionAtObservation=AllDimensions"
+
+
+CPI_FOOD = Source('cpi_food', _cpi_url(CPI_FOOD_KEY), os.path.join(DATA_DIR, 'cpi_food'))
+CPI_ALL_GROUPS = Source('cpi_all_groups', _cpi_url(CPI_ALL_GROUPS_KEY), os.path.join(DATA_DIR, 'cpi_all_groups'))
+HOUSEHOLDS = Source('households', HOUSEHOLDS_URL, os.path.join(DATA_DIR, 'households'), HOUSEHOLDS_SERIES)
+
+# Sources applied by apply_reference_data
+REFERENCE_SOURCES = (CPI_FOOD, CPI_ALL_GROUPS, HOUSEHOLDS)
+
+
+def parse_single_series(sdmx_json: Dict, series: Tuple[Tuple[str, str], ...] = ()) -> Optional[pd.DataFrame]:
+    """
+    Decode a response into a (period, value) frame for one series.
+    Dimensions in series are narrowed to the given code (None if it is
+    missing); other non-time dimensions holding several codes are
+    narrowed to their first code.
+    """
+    df = decode_sdmx_observations(sdmx_json)
+    if df is None or df.empty:
+        return None
+
+    time_col = next((col for col in df.columns if 'TIME' in col.upper()), None)
+    if time_col is None:
+        return None
+    for dim, code in series:
+        if dim not in df.columns:
+            return None
+        df = df[df[dim] == code]
+        if df.empty:
+            return None
+    for dim in df.columns:
+        if dim not in (time_col, 'value') and df[dim].nunique() > 1:
+            df = df[df[dim] == df[dim].iloc[0]]
+
+    return pd.DataFrame({
+        'period': df[time_col].astype(str).to_numpy(dtype=object),
+        'value': df['value'].to_numpy()
+    }).sort_values('period').reset_index(drop=True)
+
+
+def load_source(source: Source, max_age: float = SOURCE_MAX_AGE) -> Optional[pd.DataFrame]:
+    """
+    Source data from its cache when fresh, otherwise from the API.
+    Falls back to a stale cache if the fetch fails.
+    """
+    cached = load_snapshot(source.path, max_age=max_age)
+    if cached is not None:
+        return cached
+
+    payload = fetch_abs_data(source.url, timeout=SOURCE_TIMEOUTS.get(source.name, 30))
+    df = parse_single_series(payload, source.series) if payload else None
+    if df is None:
+        return load_snapshot(source.path)
+
+    try:
+        save_snapshot(df, source.path)
+    except OSError as e:
+        print(f"Error caching {source.name}: {e}")
+    return df
+
+
+def cpi_factor(df: Optional[pd.DataFrame]) -> Optional[float]:
+    """Latest CPI index relative to the 2015-16 average (None if not computable)."""
+    if df is None or df.empty:
+        return None
+    base = df[df['period'].isin(CPI_BASE_PERIODS)]['value']
+    if len(base) != len(CPI_BASE_PERIODS):
+        return None
+    factor = round(float(df['value'].iloc[-1] / base.mean()), 2)
+    # Guard against a wrong series slipping through
+    return factor if 1.0 <= factor <= 3.0 else None
+
+
+def household_counts(df: Optional[pd.DataFrame]) -> Dict[int, int]:
+    """Household count per year from the projections series (empty if any count is implausible)."""
+    if df is None or df.empty:
+        return {}
+    years = df['period'].str[:4].astype(int)
+    counts = {int(y): int(round(v * HOUSEHOLDS_UNIT)) for y, v in zip(years, df['value'])}
+    # Guard against a wrong series slipping through
+    low, high = HOUSEHOLDS_RANGE
+    return counts if all(low <= count <= high for count in counts.values()) else {}
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Run each task in its own thread; a failed task yields None."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(len(tasks), 1), thread_name_prefix='ingest') as pool:
+        futures = {name: pool.submit(task) for name, task in tasks.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Error ingesting {name}: {e}")
+                results[name] = None
+    return results
+
+
+def apply_reference_data(results: Dict[str, Any]) -> None:
+    """
+    Replace the hard-coded CPI factors, monthly CPI index and household
+    counts with ingested values. Each is built in full and swapped in as
+    one reference, so request threads see either the old or the new values.
+    """
+    reference = hes_data.get_cpi_reference()
+    food = cpi_factor(results.get('cpi_food'))
+    if food is not None:
+        period = results['cpi_food']['period'].iloc[-1]
+        month = quarter_to_month(period) if 'Q' in period else period[:7]
+        reference = replace(reference, food_factor=food, target_month=month,
+                            target_period=hes_data.month_label(month))
+    all_groups = cpi_factor(results.get('cpi_all_groups'))
+    if all_groups is not None:
+        reference = replace(reference, factor=all_groups)
+    if food is not None and all_groups is not None:
+        index = cpi_index_from_sources(results['cpi_food'], results['cpi_all_groups'])
+        if index is not None:
+            reference = replace(reference, index=index)
+    hes_data.set_cpi_reference(reference)
+    data_fetcher.set_household_counts(household_counts(results.get('households')))
+
+
+def apply_cached_reference_data() -> None:
+    """
+    Apply the reference sources last cached on disk, whatever their age.
+    Workers that load a snapshot instead of fetching (or restart) then use
+    the same CPI and household counts as the worker that fetched.
+    """
+    apply_reference_data({source.name: load_snapshot(source.path) for source in REFERENCE_SOURCES})
+
+
+def refresh_sources() -> Dict[str, Any]:
+    """
+    Fetch every source concurrently and apply the reference data.
+    Total time is roughly that of the slowest source. Returns the MHSI
+    (history, status) under 'mhsi' (None if the fetch raised) plus each
+    source's result; 'cube' is the new SeriesStore.
+    """
+    results = run_concurrently({
+        'mhsi': lambda: fetch_incremental(timeout=SOURCE_TIMEOUTS['mhsi']),
+        'cube': lambda: fetch_cube(timeout=SOURCE_TIMEOUTS['cube']),
+        'cpi_food': lambda: load_source(CPI_FOOD),
+        'cpi_all_groups': lambda: load_source(CPI_ALL_GROUPS),
+        'households': lambda: load_source(HOUSEHOLDS),
+    })
+    apply_reference_data(results)
+    # Built once the household counts are applied, so the store uses them
+    if results['cube'] is not None:
+        results['cube'] = install_cube(results['cube'])
+    return results
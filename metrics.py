@@ -0,0 +1,261 @@
+"""
+Prometheus-style Metrics
+Counters and latency histograms recorded in-process, flushed to a shared directory so
+/metrics can aggregate every gunicorn worker, and rendered in the text exposition format.
+"""
+
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+
+from data_store import DATA_DIR
+
+# One JSON file per worker process; shared by all workers of an instance
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+
+# Seconds between writes of a worker's metrics file (scrapes always write first)
+FLUSH_INTERVAL = 5.0
+
+# Histogram upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by route, method and status.'),
+    'upstream_fetch_duration_seconds': ('histogram', 'ABS API request latency by dataflow.'),
+    'upstream_fetch_errors_total': ('counter', 'Failed ABS API requests by dataflow.'),
+    'upstream_rejected_total': ('counter', 'ABS API requests skipped while the circuit breaker is open.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss).'),
+    'stage_duration_seconds': ('histogram', 'Duration of parse/process/build stages.'),
+    'data_age_seconds': ('gauge', 'Seconds since the served dataset was loaded (this worker).'),
+    'data_snapshot_age_seconds': ('gauge', 'Age of the shared on-disk dataset snapshot.'),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this PID exists (assumed so where it can't be checked)."""
+    if os.name == 'nt':  # os.kill would terminate the process
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+
+class MetricsRegistry:
+    """Counters and histograms for one process; cheap to update from any thread."""
+
+    def __init__(self, directory: str = METRICS_DIR, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1.0) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+        self._maybe_flush()
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Record one duration: per-bucket counts, then sum and count."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+                    break
+            values[-2] += seconds
+            values[-1] += 1
+        self._maybe_flush()
+
+    def _state(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write this process's metrics file (atomically, for concurrent readers)."""
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._state(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def remove(self, pid: int) -> None:
+        """Delete the metrics file of a process that has exited."""
+        try:
+            os.remove(os.path.join(self.directory, f'{pid}.json'))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing metrics of process {pid}: {e}")
+
+    def clear(self) -> None:
+        """Delete every process's metrics file (at server start, before workers exist)."""
+        try:
+            files = [f for f in os.listdir(self.directory) if f.endswith('.json')]
+        except OSError:
+            return
+        for filename in files:
+            stem = filename[:-len('.json')]
+            if stem.isdigit():
+                self.remove(int(stem))
+
+    def collect(self) -> Tuple[Dict, Dict]:
+        """
+        Counters and histograms summed over every live worker's metrics
+        file. Files of processes that no longer exist are deleted, so
+        restarted workers' totals drop out instead of accumulating.
+        """
+        self.flush()
+        counters: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        try:
+            files = [f for f in os.listdir(self.directory) if f.endswith('.json')]
+        except OSError:
+            files = []
+        for filename in files:
+            stem = filename[:-len('.json')]
+            if stem.isdigit() and not _pid_alive(int(stem)):
+                self.remove(int(stem))
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in state.get('counters', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, values in state.get('histograms', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.setdefault(key, [0.0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+        return counters, histograms
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(counters: Dict, histograms: Dict, gauges: Dict[str, float]) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    described = set()
+
+    def describe(name):
+        if name not in described and name in METRIC_HELP:
+            kind, text = METRIC_HELP[name]
+            lines.extend([f'# HELP {name} {text}', f'# TYPE {name} {kind}'])
+        described.add(name)
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name)
+        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+    for (name, labels), values in sorted(histograms.items()):
+        describe(name)
+        cumulative = 0.0
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {_format_value(cumulative)}')
+        lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {_format_value(values[-1])}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-2])}')
+        lines.append(f'{name}_count{_format_labels(labels)} {_format_value(values[-1])}')
+
+    for name, value in sorted(gauges.items()):
+        describe(name)
+        lines.append(f'{name} {_format_value(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    registry.inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+def dataflow_label(url: str) -> str:
+    """The 'ABS,FLOW,version' part of an ABS API URL (bounded label values)."""
+    return next((part for part in url.split('?')[0].split('/') if part.startswith('ABS,')), 'other')
+
+
+def record_upstream(dataflow: str, seconds: float, ok: bool) -> None:
+    registry.observe('upstream_fetch_duration_seconds', seconds, {'dataflow': dataflow})
+    if not ok:
+        registry.inc('upstream_fetch_errors_total', {'dataflow': dataflow})
+
+
+def timed_stage(stage: str) -> Callable:
+    """Record each call's duration under stage_duration_seconds{stage=...}."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe('stage_duration_seconds', time.perf_counter() - start, {'stage': stage})
+        return wrapper
+    return decorator
+
+
+def init_request_metrics(app: Flask) -> None:
+    """
+    Time every request into http_request_duration_seconds. Register before
+    other after_request hooks (e.g. compression) so their work is included.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_duration(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            registry.observe('http_request_duration_seconds', time.perf_counter() - start,
+                             {'route': route, 'method': request.method, 'status': str(response.status_code)})
+        return response
@@ -0,0 +1,143 @@
+"""
+Pre-serialized API Payloads
+JSON bodies for the chart and distribution endpoints, built once per data version.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from data_fetcher import get_chart_data, get_summary_stats
+from hes_data import HESSnapshot, get_cross_tab
+from metrics import record_cache
+from uncertainty import cached_series_bands
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library encoder
+    orjson = None
+
+# /api/chart-data month counts serialized up front; others are sliced on demand
+COMMON_CHART_MONTHS = (6, 12, 24, 36, 60)
+
+# HES payload sets kept per process (one per as_of month requested)
+MAX_HES_PAYLOADS = 64
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes (sorted keys, NumPy values supported)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'),
+                      default=lambda o: o.tolist() if hasattr(o, 'tolist') else str(o)).encode()
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _tail(values: List, n: int) -> List:
+    """Same rows as DataFrame.tail(n), on a plain list."""
+    return values[-n:] if n != 0 else []
+
+
+class MHSIPayloads:
+    """
+    Serialized /api/summary and /api/chart-data bodies for one dataset
+    version. Chart data includes the Monte Carlo percentile bands once they
+    have been computed (off the request path); until then it has none.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: str):
+        self.version = version
+        self.summary = dumps(get_summary_stats(df))
+        bands = cached_series_bands(df)
+        self.has_bands = bands is not None
+        self._columns = {**get_chart_data(df, len(df)), **(bands or {})}
+        self._chart_data = {n: dumps({key: _tail(values, n) for key, values in self._columns.items()})
+                            for n in COMMON_CHART_MONTHS}
+
+    def chart_data(self, months: int) -> bytes:
+        """Chart data for the last `months` rows."""
+        body = self._chart_data.get(months)
+        if body is None:
+            body = dumps({key: _tail(values, months) for key, values in self._columns.items()})
+        return body
+
+
+class HESPayloads:
+    """Serialized distribution endpoint bodies for one HES snapshot."""
+
+    def __init__(self, snapshot: HESSnapshot):
+        self.version = snapshot.version
+        # Which dollars the *_2025 amounts are in (the latest CPI period or as_of)
+        meta = {'price_period': snapshot.price_period, 'as_of': snapshot.as_of}
+        self.bodies = {
+            'quintiles': dumps({**snapshot.chart_data_quintiles, **meta}),
+            'household': dumps({**snapshot.chart_data_household, **meta}),
+            'ndis': dumps({**snapshot.chart_data_ndis, **meta}),
+            'per_person': dumps({**snapshot.per_person_chart_data, **meta}),
+            'per_person_summary': dumps({**snapshot.per_person_summary, **meta}),
+            'lone_person': dumps(snapshot.records['lone_person_data']),
+            'lone_person_summary': dumps({**snapshot.lone_person_summary, **meta}),
+            'methodology_comparison': dumps(snapshot.methodology_comparison),
+            'cross_tab': dumps(get_cross_tab(as_of=snapshot.as_of)),
+            # Every /distribution chart dataset in one body
+            'bundle': dumps({
+                **meta,
+                'quintiles': snapshot.chart_data_quintiles,
+                'household': snapshot.chart_data_household,
+                'ndis': snapshot.chart_data_ndis,
+                'per_person': snapshot.per_person_chart_data,
+            }),
+        }
+        # For a <script type="application/json"> block: '<' only occurs inside
+        # JSON strings, where \u003c is equivalent and can't close the tag
+        self.inline_bundle = self.bodies['bundle'].replace(b'<', b'\\u003c').decode()
+
+
+_mhsi: Optional[MHSIPayloads] = None
+_hes: Dict[str, HESPayloads] = {}
+_lock = threading.Lock()
+
+
+def _current(payloads: Optional[MHSIPayloads], df: pd.DataFrame, version: str) -> bool:
+    """payloads serve df's version, with bands unless they are still being computed."""
+    return (payloads is not None and payloads.version == version
+            and (payloads.has_bands or cached_series_bands(df) is None))
+
+
+def get_mhsi_payloads(df: pd.DataFrame) -> MHSIPayloads:
+    """
+    Payloads for df, serialized on the first call for its version and
+    again once its percentile bands become available.
+    """
+    global _mhsi
+    version = df.attrs.get('version', '')
+    payloads = _mhsi
+    record_cache('mhsi_payloads', _current(payloads, df, version))
+    if not _current(payloads, df, version):
+        with _lock:
+            if not _current(_mhsi, df, version):
+                _mhsi = MHSIPayloads(df, version)
+            payloads = _mhsi
+    return payloads
+
+
+def get_hes_payloads(snapshot: HESSnapshot) -> HESPayloads:
+    """Payloads for the HES snapshot, serialized on the first call for its version."""
+    payloads = _hes.get(snapshot.version)
+    record_cache('hes_payloads', payloads is not None)
+    if payloads is None:
+        payloads = HESPayloads(snapshot)
+        with _lock:
+            if len(_hes) >= MAX_HES_PAYLOADS:
+                _hes.clear()
+            payloads = _hes.setdefault(snapshot.version, payloads)
+    return payloads
+
@@ -0,0 +1,136 @@
+"""
+Background Data Refresher
+Keeps the last good spending DataFrame in memory and reloads it off the request path.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+# Seconds between scheduled reloads (MHSI is released monthly)
+REFRESH_INTERVAL = int(os.environ.get('DATA_REFRESH_INTERVAL', 6 * 60 * 60))
+
+# Seconds after a load during which explicit refresh requests are ignored
+MIN_REFRESH_INTERVAL = int(os.environ.get('DATA_MIN_REFRESH_INTERVAL', 60))
+
+
+class DataRefresher:
+    """
+    Stale-while-revalidate holder for the spending DataFrame.
+
+    Requests always read the current (DataFrame, loaded_at) pair, which is
+    swapped in as a single reference once a background load succeeds.
+    Until the first load finishes, the fallback loader (local data only)
+    supplies something to serve. The loader receives force=True when the
+    reload was explicitly triggered rather than scheduled.
+
+    Loads only ever run on the one background thread, so triggers that
+    arrive while a load is queued or running share it, and triggers within
+    min_interval of the last load are ignored.
+    """
+
+    def __init__(self,
+                 loader: Callable[[bool], pd.DataFrame],
+                 fallback_loader: Callable[[], pd.DataFrame],
+                 interval: int = REFRESH_INTERVAL,
+                 min_interval: int = MIN_REFRESH_INTERVAL):
+        self._loader = loader
+        self._fallback_loader = fallback_loader
+        self._interval = interval
+        self._min_interval = min_interval
+        self._current: Optional[Tuple[pd.DataFrame, datetime]] = None
+        self._wakeup = threading.Event()
+        self._force = False
+        self._loading = False
+        self._last_load: Optional[float] = None
+        self._lock = threading.Lock()
+        self._fallback_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def get(self) -> Tuple[pd.DataFrame, datetime]:
+        """Return the current data without ever waiting on the network."""
+        self.start()
+        current = self._current
+        if current is None:
+            # Fallback loads are serialised on their own lock, so a background
+            # load finishing meanwhile is never blocked and always wins
+            with self._fallback_lock:
+                current = self._current
+                if current is None:
+                    fallback = (self._fallback_loader(), datetime.now())
+                    with self._lock:
+                        if self._current is None:
+                            self._current = fallback
+                        current = self._current
+        return current
+
+    @property
+    def current_data(self) -> Optional[pd.DataFrame]:
+        """The DataFrame being served, or None before the first load (never loads)."""
+        current = self._current
+        return current[0] if current is not None else None
+
+    def _recently_loaded(self) -> bool:
+        return self._last_load is not None and time.monotonic() - self._last_load < self._min_interval
+
+    def trigger(self) -> str:
+        """
+        Ask the background thread to reload as soon as possible. Returns
+        'scheduled', 'pending' (a reload is already queued or running) or
+        'recent' (data was loaded within min_interval; nothing is queued).
+        """
+        self.start()
+        with self._lock:
+            if self._loading or self._force:
+                return 'pending'
+            if self._recently_loaded():
+                return 'recent'
+            self._force = True
+        self._wakeup.set()
+        return 'scheduled'
+
+    def start(self) -> None:
+        """Start the refresh thread once per process (safe after fork)."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup.set()  # load immediately on start
+            self._thread = threading.Thread(target=self._run, name='data-refresher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(timeout=self._interval)
+            self._wakeup.clear()
+            with self._lock:
+                force, self._force = self._force, False
+                if not force and self._recently_loaded():
+                    continue  # woken by a trigger the last load already served
+                self._loading = True
+            try:
+                self.refresh_now(force=force)
+            finally:
+                self._loading = False
+
+    def refresh_now(self, force: bool = False) -> bool:
+        """Load fresh data on the calling thread and swap it in."""
+        try:
+            df = self._loader(force)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error refreshing data: {e}")
+            return False
+        with self._lock:
+            self._current = (df, datetime.now())
+            self._last_load = time.monotonic()
+            self.last_error = None
+        return True
@@ -0,0 +1,218 @@
+"""
+MHSI Series Store
+Bulk ingestion of the MHSI cube (every region and spending category) into a
+dense (region, category, month) array for fast slice lookups.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import (
+    API_TIMEOUT,
+    HOUSEHOLD_INTERPOLATION,
+    build_api_url,
+    decode_sdmx_observations,
+    fetch_abs_data_conditional,
+    household_counts_for,
+    households_key
+)
+from data_store import DATA_DIR, load_snapshot, save_snapshot
+from vintage_store import record_vintage
+
+# Food-level measure, all categories, all regions (empty key positions are wildcards)
+CUBE_KEY = "7..10..M"
+CUBE_URL = build_api_url(key=CUBE_KEY)
+
+REGION_DIM = 'REGION'
+CATEGORY_DIM = 'CATEGORY'
+NATIONAL_REGION = 'AUS'
+
+CUBE_PATH = os.path.join(DATA_DIR, 'mhsi_cube')
+
+
+class SeriesStore:
+    """
+    Dense cube of MHSI values indexed by (region, category, month).
+    Missing observations are NaN. Lookups are a dict hit per axis plus a
+    binary search on the sorted month axis.
+    """
+
+    def __init__(self, regions: List[str], categories: List[str], months: List[str],
+                 values: np.ndarray, labels: Optional[Dict[str, str]] = None):
+        self.regions = list(regions)
+        self.categories = list(categories)
+        self.months = np.asarray(months, dtype=str)
+        self.values = values
+        self.labels = labels or {}
+        self._region_idx = {r: i for i, r in enumerate(self.regions)}
+        self._category_idx = {c: i for i, c in enumerate(self.categories)}
+        self._months_list = self.months.tolist()
+        # Same counts as process_data, so per-household values agree with /api/chart-data
+        self._households = household_counts_for(self._months_list).astype(float)
+        self.households_key = households_key(HOUSEHOLD_INTERPOLATION)
+        self.version = hashlib.sha1(
+            values.tobytes() + '|'.join(self.regions + self.categories + self._months_list
+                                        + [self.households_key]).encode()
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SeriesStore':
+        """Build from a long frame with region, category, month, value (and optional label) columns."""
+        regions = sorted(df['region'].astype(str).unique())
+        categories = sorted(df['category'].astype(str).unique())
+        months = sorted(df['month'].astype(str).unique())
+
+        r = pd.Categorical(df['region'].astype(str), categories=regions).codes
+        c = pd.Categorical(df['category'].astype(str), categories=categories).codes
+        m = pd.Categorical(df['month'].astype(str), categories=months).codes
+
+        values = np.full((len(regions), len(categories), len(months)), np.nan)
+        values[r, c, m] = df['value'].to_numpy(dtype=float)
+
+        labels = {}
+        for col, code_col in (('region_label', 'region'), ('category_label', 'category')):
+            if col in df.columns:
+                pairs = df[[code_col, col]].drop_duplicates(code_col)
+                labels.update(zip(pairs[code_col].astype(str), pairs[col].astype(str)))
+        return cls(regions, categories, months, values, labels)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame of all stored (non-missing) observations."""
+        r, c, m = np.nonzero(~np.isnan(self.values))
+        regions = np.array(self.regions, dtype=object)[r]
+        categories = np.array(self.categories, dtype=object)[c]
+        return pd.DataFrame({
+            'region': regions,
+            'category': categories,
+            'month': self.months[m].astype(object),
+            'value': self.values[r, c, m],
+            'region_label': [self.labels.get(x, x) for x in regions],
+            'category_label': [self.labels.get(x, x) for x in categories],
+        })
+
+    def index(self) -> Dict:
+        """Available regions, categories and month range."""
+        return {
+            'regions': [{'code': r, 'label': self.labels.get(r, r)} for r in self.regions],
+            'categories': [{'code': c, 'label': self.labels.get(c, c)} for c in self.categories],
+            'first_month': self._months_list[0] if self._months_list else None,
+            'last_month': self._months_list[-1] if self._months_list else None,
+        }
+
+    def query(self, region: str, category: str,
+              start: Optional[str] = None, end: Optional[str] = None) -> Optional[Dict]:
+        """Slice one series between start and end months (inclusive); None if unknown."""
+        r = self._region_idx.get(region)
+        c = self._category_idx.get(category)
+        if r is None or c is None:
+            return None
+
+        lo = int(np.searchsorted(self.months, start, side='left')) if start else 0
+        hi = int(np.searchsorted(self.months, end, side='right')) if end else len(self._months_list)
+        values = self.values[r, c, lo:hi]
+
+        result = {
+            'region': region,
+            'region_label': self.labels.get(region, region),
+            'category': category,
+            'category_label': self.labels.get(category, category),
+            'months': self._months_list[lo:hi],
+            'values': [None if np.isnan(v) else v for v in values.tolist()],
+        }
+        if region == NATIONAL_REGION:
+            # Same per-household calculation as process_data (AUD$ millions / households)
+            per_household = np.round(values * 1_000_000 / self._households[lo:hi], 2)
+            result['per_household'] = [None if np.isnan(v) else v for v in per_household.tolist()]
+        return result
+
+
+def cube_to_frame(sdmx_json: Dict) -> Optional[pd.DataFrame]:
+    """
+    Decode an MHSI cube response into the long region/category/month/value frame.
+    Other dimensions holding several codes are narrowed to their first code.
+    """
+    df = decode_sdmx_observations(sdmx_json, with_labels=True)
+    if df is None or df.empty or REGION_DIM not in df.columns or CATEGORY_DIM not in df.columns:
+        return None
+
+    time_col = next(col for col in df.columns if 'TIME' in col.upper() and not col.endswith('_label'))
+    for dim in df.columns:
+        if dim in (REGION_DIM, CATEGORY_DIM, time_col, 'value') or dim.endswith('_label'):
+            continue
+        if df[dim].nunique() > 1:
+            df = df[df[dim] == df[dim].iloc[0]]
+
+    return pd.DataFrame({
+        'region': df[REGION_DIM].astype(str),
+        'category': df[CATEGORY_DIM].astype(str),
+        'month': df[time_col].astype(str),
+        'value': df['value'],
+        'region_label': df[f'{REGION_DIM}_label'],
+        'category_label': df[f'{CATEGORY_DIM}_label'],
+    }).reset_index(drop=True)
+
+
+_store: Optional[SeriesStore] = None
+_store_mtime: Optional[float] = None
+_store_lock = threading.Lock()
+
+
+def fetch_cube(url: str = CUBE_URL, timeout: float = API_TIMEOUT) -> Optional[pd.DataFrame]:
+    """Fetch the whole MHSI cube in one request and record it as a vintage."""
+    _, payload, validators = fetch_abs_data_conditional(url, timeout=timeout)
+    df = cube_to_frame(payload) if payload else None
+    if df is None:
+        return None
+    record_vintage(pd.DataFrame({'series': df['region'] + '.' + df['category'],
+                                 'month': df['month'], 'value': df['value']}), validators)
+    return df
+
+
+def install_cube(df: pd.DataFrame, path: str = CUBE_PATH) -> SeriesStore:
+    """Persist a fetched cube frame and swap in a new store built from it."""
+    global _store, _store_mtime
+    store = SeriesStore.from_frame(df)
+    try:
+        save_snapshot(store.to_frame(), path)
+        _store_mtime = os.path.getmtime(path)
+    except OSError as e:
+        print(f"Error saving MHSI cube: {e}")
+    _store = store
+    return store
+
+
+def ingest_cube(url: str = CUBE_URL, path: str = CUBE_PATH,
+                timeout: float = API_TIMEOUT) -> Optional[SeriesStore]:
+    """Fetch the whole MHSI cube in one request, persist it and swap in a new store."""
+    df = fetch_cube(url, timeout=timeout)
+    return install_cube(df, path) if df is not None else None
+
+
+def get_series_store(path: str = CUBE_PATH) -> Optional[SeriesStore]:
+    """
+    Current series store. Reloaded from disk only when the saved cube
+    changes (e.g. another worker ingested a new one), and rebuilt when the
+    household counts have changed since it was built.
+    """
+    global _store, _store_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = _store_mtime
+    key = households_key(HOUSEHOLD_INTERPOLATION)
+    if mtime != _store_mtime or (_store is not None and _store.households_key != key):
+        with _store_lock:
+            if mtime != _store_mtime:
+                df = load_snapshot(path)
+                if df is not None and not df.empty:
+                    _store = SeriesStore.from_frame(df)
+                _store_mtime = mtime
+            elif _store is not None and _store.households_key != key:
+                _store = SeriesStore(_store.regions, _store.categories, _store._months_list,
+                                     _store.values, _store.labels)
+    return _store
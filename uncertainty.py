@@ -0,0 +1,312 @@
+"""
+Monte Carlo Uncertainty Bands
+Samples household counts, CPI factors and HES table values from configurable distributions,
+propagates them through the per-household and HES calculations and reports percentile bands.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import HOUSEHOLD_INTERPOLATION, ROLLING_WINDOW, household_counts_for
+from hes_data import HESSnapshot, get_hes_snapshot, weekly_to_monthly
+from metrics import record_cache, timed_stage
+
+# Draws per simulation, simulated in chunks of CHUNK_DRAWS to bound memory
+UNCERTAINTY_DRAWS = int(os.environ.get('UNCERTAINTY_DRAWS', 1_000_000))
+CHUNK_DRAWS = 100_000
+
+# Processes the chunks are split across (1 simulates in the calling thread)
+UNCERTAINTY_WORKERS = int(os.environ.get('UNCERTAINTY_WORKERS', 1))
+
+# Fixed seed: a data version always gets the same bands, however the chunks are split
+UNCERTAINTY_SEED = int(os.environ.get('UNCERTAINTY_SEED', 5682))
+
+PERCENTILES = (5, 50, 95)
+
+# Percentiles are read from per-output histograms accumulated over the chunks
+HISTOGRAM_BINS = 4096
+
+DISTRIBUTIONS = ('normal', 'lognormal', 'uniform')
+
+
+def _input_spec(name: str, default: Tuple[str, float]) -> Tuple[str, float]:
+    """(distribution, relative standard error) from UNCERTAINTY_<NAME>, e.g. 'lognormal:0.03'."""
+    value = os.environ.get(f'UNCERTAINTY_{name.upper()}')
+    if not value:
+        return default
+    distribution, _, rse = value.partition(':')
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"UNCERTAINTY_{name.upper()}: unknown distribution {distribution!r}")
+    return distribution, float(rse or default[1])
+
+
+# Multiplicative error on each input: household projections (one draw per
+# projection year), the CPI factors (one draw shared by every table value)
+# and each HES table value
+UNCERTAINTY_INPUTS = {
+    'households': _input_spec('households', ('normal', 0.02)),
+    'cpi': _input_spec('cpi', ('normal', 0.01)),
+    'hes': _input_spec('hes', ('normal', 0.05)),
+}
+
+
+def sample_factors(rng: np.random.Generator, spec: Tuple[str, float], size) -> np.ndarray:
+    """Multiplicative factors with mean 1 and standard deviation rse."""
+    distribution, rse = spec
+    if rse == 0:
+        return np.ones(size)
+    if distribution == 'lognormal':
+        sigma = np.sqrt(np.log1p(rse ** 2))
+        return np.exp(rng.standard_normal(size) * sigma - sigma ** 2 / 2)
+    if distribution == 'uniform':
+        return 1 + rng.uniform(-1, 1, size) * rse * np.sqrt(3)
+    return 1 + rng.standard_normal(size) * rse
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Row-wise trailing mean over `window` columns (fewer at the start, like min_periods=1)."""
+    cumulative = np.cumsum(values, axis=1)
+    result = cumulative.copy()
+    result[:, window:] -= cumulative[:, :-window]
+    return result / np.minimum(np.arange(1, values.shape[1] + 1), window)
+
+
+def _household_model(rng: np.random.Generator, draws: int, food: np.ndarray, households: np.ndarray,
+                     year_index: np.ndarray, n_years: int, spec: Tuple[str, float]) -> np.ndarray:
+    """Per-household monthly spending and its rolling average for each draw (draws x 2 months)."""
+    factors = sample_factors(rng, spec, (draws, n_years))
+    per_household = food * 1_000_000 / (households * factors[:, year_index])
+    return np.hstack([per_household, _rolling_mean(per_household, ROLLING_WINDOW)])
+
+
+def _hes_model(rng: np.random.Generator, draws: int, weekly_2016: np.ndarray, avg_persons: np.ndarray,
+               cpi_food: float, hes_spec: Tuple[str, float], cpi_spec: Tuple[str, float]) -> np.ndarray:
+    """Monthly household and per-person spending for each table row and draw (draws x 2 rows)."""
+    weekly = weekly_2016 * sample_factors(rng, hes_spec, (draws, len(weekly_2016)))
+    monthly = weekly_to_monthly(weekly * cpi_food * sample_factors(rng, cpi_spec, (draws, 1)))
+    return np.hstack([monthly, monthly / avg_persons])
+
+
+def _histogram(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Per-column bin counts (columns x bins); values outside [lo, hi] land in
+    the edge bins. Works in place: values is overwritten.
+    """
+    n = values.shape[1]
+    values -= lo
+    values *= bins / (hi - lo)
+    np.clip(values, 0, bins - 1, out=values)
+    values += np.arange(n) * bins
+    return np.bincount(values.astype(np.intp).ravel(), minlength=n * bins).reshape(n, bins)
+
+
+def _chunk_counts(model: Callable, seed: np.random.SeedSequence, draws: int,
+                  lo: np.ndarray, hi: np.ndarray, bins: int) -> np.ndarray:
+    return _histogram(model(np.random.default_rng(seed), draws), lo, hi, bins)
+
+
+def _percentiles_from_counts(counts: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                             percentiles: Sequence[float]) -> np.ndarray:
+    """Percentiles (len(percentiles) x columns), interpolated within bins."""
+    bins = counts.shape[1]
+    cumulative = np.cumsum(counts, axis=1)
+    width = (hi - lo) / bins
+    result = np.empty((len(percentiles), counts.shape[0]))
+    for i, p in enumerate(percentiles):
+        target = cumulative[:, -1] * p / 100
+        index = (cumulative < target[:, None]).sum(axis=1).clip(0, bins - 1)
+        rows = np.arange(len(index))
+        below = np.where(index > 0, cumulative[rows, index - 1], 0)
+        fraction = np.divide(target - below, counts[rows, index],
+                             out=np.full(len(index), 0.5), where=counts[rows, index] > 0)
+        result[i] = lo + (index + fraction.clip(0, 1)) * width
+    return result
+
+
+def simulate(model: Callable[[np.random.Generator, int], np.ndarray], draws: int = UNCERTAINTY_DRAWS,
+             percentiles: Sequence[float] = PERCENTILES, workers: int = UNCERTAINTY_WORKERS,
+             seed: int = UNCERTAINTY_SEED) -> np.ndarray:
+    """
+    Run model(rng, n) -> (n, outputs) for `draws` draws in chunks and return
+    the percentiles of every output (len(percentiles) x outputs). The first
+    chunk sets each output's histogram range; later chunks only add counts,
+    so they can run in other processes (model must then be picklable).
+    """
+    sizes = [CHUNK_DRAWS] * (draws // CHUNK_DRAWS) + ([draws % CHUNK_DRAWS] if draws % CHUNK_DRAWS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    pilot = model(np.random.default_rng(seeds[0]), sizes[0])
+    low, high = pilot.min(axis=0), pilot.max(axis=0)
+    margin = np.maximum((high - low) * 0.5, np.abs(high) * 1e-9 + 1e-12)
+    lo, hi = low - margin, high + margin
+    counts = _histogram(pilot, lo, hi, HISTOGRAM_BINS)
+
+    jobs = list(zip(seeds[1:], sizes[1:]))
+    if workers > 1 and jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in pool.map(partial(_chunk_counts, model, lo=lo, hi=hi, bins=HISTOGRAM_BINS),
+                                  *zip(*jobs)):
+                counts += chunk
+    else:
+        for chunk_seed, size in jobs:
+            counts += _chunk_counts(model, chunk_seed, size, lo, hi, HISTOGRAM_BINS)
+    return _percentiles_from_counts(counts, lo, hi, percentiles)
+
+
+# (kind, data version, inputs) -> bands; a few data versions are kept per process
+_bands: Dict[Tuple, Any] = {}
+_bands_lock = threading.Lock()
+# key -> lock held while that key's bands are computed
+_computing: Dict[Tuple, threading.Lock] = {}
+MAX_CACHED_BANDS = 16
+
+
+def _cached(key: Tuple, compute: Callable[[], Any]) -> Any:
+    """
+    compute() once per key. Concurrent callers for the same key wait for
+    the first; other keys are computed (and cached bands read) meanwhile.
+    """
+    bands = _bands.get(key)
+    record_cache('uncertainty_bands', bands is not None)
+    if bands is not None:
+        return bands
+    with _bands_lock:
+        key_lock = _computing.setdefault(key, threading.Lock())
+    with key_lock:
+        bands = _bands.get(key)
+        if bands is None:
+            try:
+                bands = compute()
+                with _bands_lock:
+                    if len(_bands) >= MAX_CACHED_BANDS:
+                        _bands.clear()
+                    _bands[key] = bands
+            finally:
+                with _bands_lock:
+                    _computing.pop(key, None)
+    return bands
+
+
+def _band_key(prefix: str, p: float) -> str:
+    return f"{prefix}_p{p:g}"
+
+
+def series_model(df: pd.DataFrame, interpolate: bool = HOUSEHOLD_INTERPOLATION) -> Callable:
+    """simulate() model for the per-household columns of a process_data result."""
+    month = df['month'].to_numpy(dtype=str)
+    years, year_index = np.unique(np.char.partition(month, '-')[:, 0], return_inverse=True)
+    return partial(_household_model, food=df['food_aud_m_sa'].to_numpy(dtype=float),
+                   households=household_counts_for(month, interpolate).astype(float),
+                   year_index=year_index, n_years=len(years), spec=UNCERTAINTY_INPUTS['households'])
+
+
+def table_model(table: pd.DataFrame, cpi_food: float) -> Callable:
+    """simulate() model for a HES table with weekly_2016 and avg_persons columns."""
+    return partial(_hes_model, weekly_2016=table['weekly_2016'].to_numpy(dtype=float),
+                   avg_persons=table['avg_persons'].to_numpy(dtype=float), cpi_food=cpi_food,
+                   hes_spec=UNCERTAINTY_INPUTS['hes'], cpi_spec=UNCERTAINTY_INPUTS['cpi'])
+
+
+@timed_stage('uncertainty_series')
+def _compute_series_bands(df: pd.DataFrame, interpolate: bool) -> Dict[str, List[float]]:
+    result = simulate(series_model(df, interpolate)).round(2)
+    n = len(df)
+    bands = {}
+    for p, row in zip(PERCENTILES, result):
+        bands[_band_key('values', p)] = row[:n].tolist()
+        bands[_band_key('rolling_avg', p)] = row[n:].tolist()
+    return bands
+
+
+def _series_key(df: pd.DataFrame, interpolate: bool) -> Tuple:
+    return ('series', df.attrs.get('version') or id(df), df.attrs.get('households_key'),
+            interpolate, tuple(sorted(UNCERTAINTY_INPUTS.items())))
+
+
+def series_bands(df: pd.DataFrame, interpolate: bool = HOUSEHOLD_INTERPOLATION) -> Dict[str, List[float]]:
+    """
+    Percentile bands of food_per_household_month ('values_p5', ...) and
+    food_per_hh_12m_avg ('rolling_avg_p5', ...), one value per row of the
+    output of process_data. Computed once per data version; the simulation
+    takes seconds, so call this off the request path.
+    """
+    if df.empty:
+        return {}
+    return _cached(_series_key(df, interpolate), lambda: _compute_series_bands(df, interpolate))
+
+
+def cached_series_bands(df: pd.DataFrame,
+                        interpolate: bool = HOUSEHOLD_INTERPOLATION) -> Optional[Dict[str, List[float]]]:
+    """series_bands if already computed for df, else None (never simulates)."""
+    if df.empty:
+        return {}
+    return _bands.get(_series_key(df, interpolate))
+
+
+def _table_bands(table: pd.DataFrame, label_column: str, cpi_food: float) -> Dict[str, List]:
+    result = simulate(table_model(table, cpi_food)).round(2)
+    n = len(table)
+    bands = {'labels': table[label_column].tolist()}
+    for p, row in zip(PERCENTILES, result):
+        bands[_band_key('monthly', p)] = row[:n].tolist()
+        bands[_band_key('per_person', p)] = row[n:].tolist()
+    return bands
+
+
+@timed_stage('uncertainty_distribution')
+def _compute_distribution_bands(snapshot: HESSnapshot) -> Dict[str, Any]:
+    quintiles, households = snapshot.quintile_data, snapshot.household_data
+    cpi_food = snapshot.cpi_food_factor
+    return {
+        'quintiles': _table_bands(quintiles, 'quintile', cpi_food),
+        'household': _table_bands(households, 'household_type', cpi_food),
+        'draws': UNCERTAINTY_DRAWS,
+        'percentiles': list(PERCENTILES),
+        'inputs': {name: {'distribution': d, 'rse': rse} for name, (d, rse) in UNCERTAINTY_INPUTS.items()},
+        'as_of': snapshot.as_of,
+    }
+
+
+def _rebased_bands(bands: Dict[str, Any], factor: float, as_of: str) -> Dict[str, Any]:
+    """Bands scaled by factor (spending is linear in the CPI factor, so its percentiles are too)."""
+    def scale(table):
+        return {key: values if key == 'labels' else [round(v * factor, 2) for v in values]
+                for key, values in table.items()}
+    return {**bands, 'quintiles': scale(bands['quintiles']), 'household': scale(bands['household']),
+            'as_of': as_of}
+
+
+def _distribution_key(snapshot: HESSnapshot) -> Tuple:
+    return ('distribution', snapshot.version, tuple(sorted(UNCERTAINTY_INPUTS.items())))
+
+
+def distribution_bands(snapshot: HESSnapshot) -> Dict[str, Any]:
+    """
+    Percentile bands of monthly household and per-person spending for the
+    income quintile and household type tables. Computed once per base
+    snapshot; an as_of snapshot scales the base bands by its CPI ratio
+    instead of simulating again. The simulation takes seconds, so call
+    this off the request path.
+    """
+    if snapshot.as_of:
+        base = get_hes_snapshot()
+        return _rebased_bands(distribution_bands(base), snapshot.cpi_food_factor / base.cpi_food_factor,
+                              snapshot.as_of)
+    return _cached(_distribution_key(snapshot), lambda: _compute_distribution_bands(snapshot))
+
+
+def cached_distribution_bands(snapshot: HESSnapshot) -> Optional[Dict[str, Any]]:
+    """distribution_bands if the base snapshot's bands are already computed, else None (never simulates)."""
+    if snapshot.as_of:
+        base = get_hes_snapshot()
+        bands = _bands.get(_distribution_key(base))
+        if bands is None:
+            return None
+        return _rebased_bands(bands, snapshot.cpi_food_factor / base.cpi_food_factor, snapshot.as_of)
+    return _bands.get(_distribution_key(snapshot))
@@ -0,0 +1,215 @@
+"""
+MHSI Vintage Store
+Append-only SQLite record of every fetched MHSI release, so earlier releases and the
+revisions ABS makes to recent months can be compared later.
+"""
+
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from data_store import DATA_DIR
+
+VINTAGES_PATH = os.path.join(DATA_DIR, 'mhsi_vintages.sqlite')
+
+# Series name of the national food series (cube series are named REGION.CATEGORY)
+FOOD_SERIES = 'food_aud_m_sa'
+
+# Every recorded fetch that changed something is its own release; several may
+# share a release_date. Observations only holds values that changed since the
+# previous release, so its size grows with new months and revisions, not with
+# the number of fetches. latest mirrors the newest value of every (series, month)
+# for change detection.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    release_id INTEGER PRIMARY KEY,
+    release_date TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    observations INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS observations (
+    series TEXT NOT NULL,
+    month TEXT NOT NULL,
+    release_id INTEGER NOT NULL REFERENCES releases (release_id),
+    value REAL,
+    PRIMARY KEY (series, month, release_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_release ON observations (release_id);
+CREATE INDEX IF NOT EXISTS releases_date ON releases (release_date);
+CREATE TABLE IF NOT EXISTS latest (
+    series TEXT NOT NULL,
+    month TEXT NOT NULL,
+    release_id INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (series, month)
+) WITHOUT ROWID;
+"""
+
+# Value of every month of a series in the newest release at or before a release id
+AS_OF_QUERY = """
+SELECT o.month, o.value, r.release_date
+FROM observations o JOIN releases r ON r.release_id = o.release_id
+WHERE o.series = ? AND o.release_id = (
+    SELECT MAX(release_id) FROM observations
+    WHERE series = o.series AND month = o.month AND release_id <= ?
+)
+ORDER BY o.month
+"""
+
+def release_date(validators: Optional[Dict[str, str]] = None) -> str:
+    """Release date (YYYY-MM-DD) from a response's Last-Modified header, else today."""
+    last_modified = (validators or {}).get('last_modified')
+    if last_modified:
+        try:
+            return parsedate_to_datetime(last_modified).date().isoformat()
+        except (TypeError, ValueError):
+            pass
+    return date.today().isoformat()
+
+
+def parse_release_date(value: str) -> str:
+    """Validate a YYYY-MM-DD release date (ValueError otherwise)."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid release date: {value!r} (expected YYYY-MM-DD)")
+
+
+class VintageStore:
+    """
+    Observations keyed by (series, month, release). Each release stores only
+    the values that are new or revised, so "as of release X" reads the newest
+    row per month at or before X through the primary key.
+    """
+
+    def __init__(self, path: str = VINTAGES_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # WAL lets workers read while the refreshing worker appends
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def record_release(self, observations: pd.DataFrame, release: str) -> int:
+        """
+        Append a fetched release: a frame with series, month and value
+        columns. Only values that differ from the latest stored vintage are
+        written, as a new release even when an earlier fetch had the same
+        release date; missing values are skipped. Returns the number of
+        observations added.
+        """
+        observations = observations.dropna(subset=['value'])
+        if observations.empty:
+            return 0
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                series = observations['series'].unique().tolist()
+                placeholders = ','.join('?' * len(series))
+                latest = pd.read_sql_query(
+                    f'SELECT series, month, value AS previous FROM latest WHERE series IN ({placeholders})',
+                    conn, params=series)
+                merged = observations[['series', 'month', 'value']].merge(latest, on=['series', 'month'], how='left')
+                changed = merged[merged['value'].to_numpy(dtype=float) != merged['previous'].to_numpy(dtype=float)]
+                if changed.empty:
+                    conn.execute('COMMIT')
+                    return 0
+
+                changed = changed.drop_duplicates(['series', 'month'], keep='last')
+                release_id = conn.execute(
+                    'INSERT INTO releases (release_date, recorded_at, observations) VALUES (?, ?, ?)',
+                    (release, datetime.now().isoformat(timespec='seconds'), len(changed))).lastrowid
+                rows = list(zip(changed['series'], changed['month'], [release_id] * len(changed),
+                                changed['value'].astype(float).tolist()))
+                conn.executemany('INSERT INTO observations VALUES (?, ?, ?, ?)', rows)
+                conn.executemany('INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?)', rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+    def version(self) -> str:
+        """Changes whenever a release is recorded."""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT COUNT(*), MAX(release_id), SUM(observations) FROM releases').fetchone()
+        return hashlib.sha1(repr(row).encode()).hexdigest()[:16]
+
+    def releases(self) -> List[Dict]:
+        """Every recorded release, oldest first, with its count of new or revised values."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT release_date, recorded_at, observations FROM releases '
+                                'ORDER BY release_id').fetchall()
+        return [{'release_date': d, 'recorded_at': r, 'observations': n} for d, r, n in rows]
+
+    def series(self) -> List[str]:
+        with closing(self._connect()) as conn:
+            return [s for (s,) in conn.execute('SELECT DISTINCT series FROM latest ORDER BY series')]
+
+    def _release_id(self, conn: sqlite3.Connection, release: Optional[str]) -> Optional[int]:
+        """Newest release id on or before the release date (latest if None)."""
+        if release is None:
+            return conn.execute('SELECT MAX(release_id) FROM releases').fetchone()[0]
+        return conn.execute('SELECT MAX(release_id) FROM releases WHERE release_date <= ?',
+                            (release,)).fetchone()[0]
+
+    def as_of(self, series: str, release: Optional[str] = None) -> pd.DataFrame:
+        """month, value and release_date of a series as published in a release (default latest)."""
+        with closing(self._connect()) as conn:
+            release_id = self._release_id(conn, release)
+            if release_id is None:
+                return pd.DataFrame(columns=['month', 'value', 'release_date'])
+            return pd.read_sql_query(AS_OF_QUERY, conn, params=(series, release_id))
+
+    def revisions(self, series: str, from_release: str, to_release: Optional[str] = None) -> pd.DataFrame:
+        """
+        Months whose value changed between two releases: month, previous,
+        value and delta (previous is NaN for months first published later).
+        """
+        before = self.as_of(series, from_release)[['month', 'value']].rename(columns={'value': 'previous'})
+        after = self.as_of(series, to_release)[['month', 'value', 'release_date']]
+        merged = after.merge(before, on='month', how='left')
+        changed = merged[merged['value'] != merged['previous']].copy()
+        changed['delta'] = changed['value'] - changed['previous']
+        return changed[['month', 'previous', 'value', 'delta', 'release_date']].reset_index(drop=True)
+
+    def month_vintages(self, series: str, month: str) -> pd.DataFrame:
+        """Every published value of one month: release_date and value, oldest first."""
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                'SELECT r.release_date, o.value FROM observations o '
+                'JOIN releases r ON r.release_id = o.release_id '
+                'WHERE o.series = ? AND o.month = ? ORDER BY o.release_id',
+                conn, params=(series, month))
+
+
+_store: Optional[VintageStore] = None
+
+
+def get_vintage_store(path: str = VINTAGES_PATH) -> VintageStore:
+    """Vintage store at path (the default one is opened once per process)."""
+    global _store
+    if path != VINTAGES_PATH:
+        return VintageStore(path)
+    if _store is None:
+        _store = VintageStore(path)
+    return _store
+
+
+def record_vintage(observations: pd.DataFrame, validators: Optional[Dict[str, str]] = None) -> int:
+    """Record a fetched release; storage errors are reported, never raised to the fetch."""
+    try:
+        return get_vintage_store().record_release(observations, release_date(validators))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error recording MHSI vintage: {e}")
+        return 0